@@ -21,5 +21,9 @@ def main():
     page = PAGES[selection]
     page.main()
 
+    # Usage weighting last, so polling its job never blocks the page
+    from utils.job_ui import show_usage_loader
+    show_usage_loader()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,10 +1,111 @@
 import streamlit as st
 import pandas as pd
 from utils.auth import show_authentication
-from utils.pricing import fetch_ec2_comparison
-from utils.models import EC2ExtendedEntry
+from utils.pricing import run_ec2_job
+from utils.spot import SPOT_HISTORY_DAYS, run_spot_job
+from utils.discovery import discover_ec2_instances
+from utils.job_ui import start_job, poll_job, show_query_plan, show_validation_errors
+from utils.result_store import cheapest_per_group, get_result_store, table_to_csv, weight_ec2_table
+from utils.validation import validate_ec2_inventory
 from typing import Literal
 
+def show_results(handle, filtered):
+    # Session state only holds a handle; the table itself is shared and immutable
+    table = get_result_store().get(handle)
+    if table is None:
+        st.warning("Results are no longer available, please run the comparison again.")
+        return
+    if filtered:
+        table = cheapest_per_group(table)
+        if table.num_rows == 0:
+            st.warning("No valid rows to filter.")
+            return
+
+    table = weight_ec2_table(table, st.session_state.get("cur_usage"))
+    st.dataframe(table)
+    st.download_button(
+        "Download CSV (Filtered)" if filtered else "Download CSV",
+        table_to_csv(table),
+        "ec2_comparison_filtered.csv" if filtered else "ec2_comparison.csv",
+        "text/csv",
+    )
+
+def discover_and_compare(prefix, run_label, job_kind, job_fn, title, show_events=False):
+    """
+    Discover-then-compare flow shared by the Automatic and Spot modes:
+    lists running instances of a region, then runs job_fn over them in the
+    background. State lives under the ec2_<prefix>_* session keys.
+    """
+    instances_key = f"ec2_{prefix}_instances"
+    events_key = f"ec2_{prefix}_retirement"
+    results_key = f"ec2_{prefix}_results"
+    filtered_key = f"ec2_{prefix}_filtered"
+    plan_key = f"ec2_{prefix}_plan"
+
+    region_options = ["All Regions", "Paris", "Frankfurt", "Ireland", "London", "N. Virginia", "Oregon"]
+    selected_region = st.selectbox("Select Region", region_options, index=0, key=f"{prefix}_region")
+
+    if instances_key not in st.session_state:
+        st.session_state[instances_key] = None
+    if results_key not in st.session_state:
+        st.session_state[results_key] = None
+    if filtered_key not in st.session_state:
+        st.session_state[filtered_key] = False
+
+    if st.button("🔎 Discover EC2 Instances", key=f"{prefix}_discover"):
+        start_job(
+            f"ec2_{prefix}_discovery_job", "ec2_discovery", discover_ec2_instances, selected_region
+        )
+
+    discovery_job = poll_job(f"ec2_{prefix}_discovery_job")
+    if discovery_job is not None:
+        if discovery_job.status == "failed":
+            st.error(f"❌ Discovery failed: {discovery_job.error}")
+        else:
+            st.session_state[instances_key] = discovery_job.result["instances"]
+            st.session_state[events_key] = discovery_job.result["retirement"]
+            st.session_state[results_key] = None
+            st.session_state[filtered_key] = False
+            if not discovery_job.result["instances"]:
+                st.warning("There are no instances in this region, check other regions please.")
+
+    instances = st.session_state[instances_key]
+    if instances:
+        st.markdown("### 📋 Discovered EC2 Instances")
+        st.dataframe(pd.DataFrame(instances))
+        if show_events:
+            # Show scheduled events info or message if none
+            st.markdown("### ⏳ EC2 Scheduled Events")
+            if st.session_state.get(events_key):
+                st.dataframe(pd.DataFrame(st.session_state[events_key]))
+            else:
+                st.info("No EC2 instances have scheduled events in the selected region(s).")
+        if st.button(run_label, key=f"{prefix}_run_compare"):
+            rows = [e for e in instances if e["memory_gb"] is not None and e["vcpus"]]
+            start_job(f"ec2_{prefix}_job", job_kind, job_fn, rows)
+
+    job = poll_job(f"ec2_{prefix}_job")
+    if job is not None:
+        if job.status == "failed":
+            st.error(f"❌ {title} failed: {job.error}")
+        else:
+            st.session_state[results_key] = get_result_store().put(
+                pd.DataFrame(job.result["results"])
+            )
+            st.session_state[plan_key] = job.result["plan"]
+            st.session_state[filtered_key] = False
+            st.success(f"✅ {title} complete.")
+
+    def set_filtered(value):
+        st.session_state[filtered_key] = value
+
+    if st.session_state[results_key] is not None:
+        show_results(st.session_state[results_key], st.session_state[filtered_key])
+        show_query_plan(st.session_state.get(plan_key))
+        col1, col2 = st.columns(2)
+        col1.button("🔍 Filter Cheapest Option", key=f"{prefix}_filter", on_click=set_filtered, args=(True,))
+        col2.button("🔄 Reset Results", key=f"{prefix}_reset", on_click=set_filtered, args=(False,))
+
 def main():
     st.set_page_config(page_title="EC2 Analysis", layout="centered")
     st.title("🖥️ EC2 Analysis")
@@ -12,174 +113,33 @@ def main():
     st.markdown("## EC2 Input Method")
 
     input_mode = st.radio(
-        "Choose input method:", ["Automatic", "Paste CSV Text", "CSV Upload"]
+        "Choose input method:", ["Automatic", "Spot Comparison", "Paste CSV Text", "CSV Upload"]
     )
 
     if input_mode == "Automatic":
-        st.subheader("� Automatic EC2 Instance Discovery")
-        region_options = ["All Regions", "Paris", "Frankfurt", "Ireland", "London", "N. Virginia", "Oregon"]
-        selected_region = st.selectbox("Select Region", region_options, index=0)
-
-        def get_all_ec2_instances(region_choice):
-            import boto3
-            import os
-            from utils.helpers import REGION_MAP
-            # Use credentials from .env
-            access_key = os.getenv("AWS_ACCESS_KEY_ID")
-            secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-            # If All Regions, use all mapped regions
-            regions_to_query = []
-            if region_choice == "All Regions":
-                regions_to_query = list(REGION_MAP.values())
-            else:
-                regions_to_query = [REGION_MAP.get(region_choice, region_choice)]
-            all_instances = []
-            retirement_info = []
-            for reg in regions_to_query:
-                try:
-                    ec2 = boto3.client(
-                        "ec2",
-                        region_name=reg,
-                        aws_access_key_id=access_key,
-                        aws_secret_access_key=secret_key,
-                    )
-                    reservations = ec2.describe_instances()["Reservations"]
-                    instance_ids = []
-                    for res in reservations:
-                        for inst in res["Instances"]:
-                            instance_type = inst.get("InstanceType", "")
-                            vcpus = inst.get("CpuOptions", {}).get("CoreCount", 0) * inst.get("CpuOptions", {}).get("ThreadsPerCore", 1)
-                            memory_gb = None
-                            instance_id = inst.get("InstanceId", "")
-                            instance_ids.append(instance_id)
-                            # Try to get memory from instance type description
-                            try:
-                                ec2_desc = boto3.client(
-                                    "ec2",
-                                    region_name=reg,
-                                    aws_access_key_id=access_key,
-                                    aws_secret_access_key=secret_key,
-                                )
-                                type_info = ec2_desc.describe_instance_types(InstanceTypes=[instance_type])
-                                memory_gb = type_info["InstanceTypes"][0]["MemoryInfo"]["SizeInMiB"] / 1024
-                            except Exception:
-                                memory_gb = None
-                            all_instances.append({
-                                "instance_type": instance_type,
-                                "vcpus": vcpus,
-                                "memory_gb": memory_gb,
-                                "region": reg,
-                                "instance_id": instance_id,
-                            })
-                    # Get scheduled events for instances in this region
-                    if instance_ids:
-                        try:
-                            events = ec2.describe_instance_status(InstanceIds=instance_ids)["InstanceStatuses"]
-                            for status in events:
-                                instance_id = status.get("InstanceId", "")
-                                scheduled_events = status.get("Events", [])
-                                for event in scheduled_events:
-                                    event_info = {
-                                        "instance_id": instance_id,
-                                        "region": reg,
-                                        "event_code": event.get("Code", ""),
-                                        "not_before": event.get("NotBefore", ""),
-                                        "not_after": event.get("NotAfter", ""),
-                                        "description": event.get("Description", ""),
-                                    }
-                                    retirement_info.append(event_info)
-                        except Exception:
-                            pass
-                except Exception:
-                    continue
-            return all_instances, retirement_info
-
-        if "ec2_auto_instances" not in st.session_state:
-            st.session_state.ec2_auto_instances = None
-        if "ec2_auto_results" not in st.session_state:
-            st.session_state.ec2_auto_results = None
-        if "ec2_auto_filtered" not in st.session_state:
-            st.session_state.ec2_auto_filtered = False
-
-        if st.button("� Discover EC2 Instances"):
-            instances, retirement_info = get_all_ec2_instances(selected_region)
-            st.session_state.ec2_auto_instances = instances
-            st.session_state.ec2_auto_retirement = retirement_info
-            st.session_state.ec2_auto_results = None
-            st.session_state.ec2_auto_filtered = False
-            if not instances:
-                st.warning("There are no instances in this region, check other regions please.")
+        st.subheader("🔎 Automatic EC2 Instance Discovery")
+        discover_and_compare(
+            "auto",
+            "✅ Run Graviton check",
+            "ec2_comparison",
+            run_ec2_job,
+            "EC2 Graviton check",
+            show_events=True,
+        )
 
-        if st.session_state.ec2_auto_instances:
-            if len(st.session_state.ec2_auto_instances) == 0:
-                st.warning("There are no instances in this region, check other regions please.")
-            else:
-                st.markdown("### 📋 Discovered EC2 Instances")
-                df_auto = pd.DataFrame(st.session_state.ec2_auto_instances)
-                st.dataframe(df_auto)
-                # Show scheduled events info or message if none
-                st.markdown("### ⏳ EC2 Scheduled Events")
-                if "ec2_auto_retirement" in st.session_state and st.session_state.ec2_auto_retirement:
-                    df_events = pd.DataFrame(st.session_state.ec2_auto_retirement)
-                    st.dataframe(df_events)
-                else:
-                    st.info("No EC2 instances have scheduled events in the selected region(s).")
-                if st.button("✅ Run Graviton check", key="auto_run_compare"):
-                    results = []
-                    for e in st.session_state.ec2_auto_instances:
-                        if e["memory_gb"] is not None and e["vcpus"]:
-                            candidate_list = fetch_ec2_comparison(
-                                e["instance_type"], int(e["vcpus"]), float(e["memory_gb"]), e["region"]
-                            )
-                            results.extend(candidate_list)
-                    df_results = pd.DataFrame(results)
-                    st.session_state.ec2_auto_results = df_results
-                    st.session_state.ec2_auto_filtered = False
-                    st.success("✅ EC2 Graviton check complete.")
-
-        def set_ec2_auto_filtered_true():
-            st.session_state.ec2_auto_filtered = True
-        def set_ec2_auto_filtered_false():
-            st.session_state.ec2_auto_filtered = False
-
-        if st.session_state.ec2_auto_results is not None:
-            df = st.session_state.ec2_auto_results.copy()
-            if st.session_state.ec2_auto_filtered:
-                df["candidate_monthly_raw"] = (
-                    df["candidate_monthly"]
-                    .replace("[\$,]", "", regex=True)
-                    .astype(float)
-                )
-                # Drop rows with NaN in filter columns
-                df_filtered = df.dropna(subset=["input_type", "region", "candidate_monthly_raw"])
-                if not df_filtered.empty:
-                    filtered_df = df_filtered.loc[
-                        df_filtered.groupby(["input_type", "region"])[
-                            "candidate_monthly_raw"
-                        ].idxmin()
-                    ]
-                    st.dataframe(filtered_df.drop(columns=["candidate_monthly_raw"]))
-                    st.download_button(
-                        "Download CSV (Filtered)",
-                        filtered_df.drop(columns=["candidate_monthly_raw"]).to_csv(
-                            index=False
-                        ),
-                        "ec2_comparison_filtered.csv",
-                        "text/csv",
-                    )
-                else:
-                    st.warning("No valid rows to filter.")
-            else:
-                st.dataframe(df)
-                st.download_button(
-                    "Download CSV",
-                    df.to_csv(index=False),
-                    "ec2_comparison.csv",
-                    "text/csv",
-                )
-            col1, col2 = st.columns(2)
-            col1.button("🔍 Filter Cheapest Option", key="auto_filter", on_click=set_ec2_auto_filtered_true)
-            col2.button("🔄 Reset Results", key="auto_reset", on_click=set_ec2_auto_filtered_false)
+    elif input_mode == "Spot Comparison":
+        st.subheader("🎯 Spot Price Comparison")
+        st.caption(
+            f"Discovered instances and their Graviton candidates against the last {SPOT_HISTORY_DAYS} days "
+            "of Linux spot prices: mean, p90 and the AZ with the lowest p90."
+        )
+        discover_and_compare(
+            "spot",
+            "✅ Run Spot comparison",
+            "ec2_spot_comparison",
+            run_spot_job,
+            "Spot comparison",
+        )
 
     # --- Manual Input (CSV-style) ---
     elif input_mode == "Paste CSV Text":
@@ -208,33 +168,38 @@ def main():
             st.session_state.ec2_filtered_csv = False
 
         if st.button("✅ Run Comparison", key="run_csv_text"):
+            # A file-level error must not leave the previous row report up
+            st.session_state.ec2_csv_errors = None
             try:
                 from io import StringIO
 
                 df_input = pd.read_csv(StringIO(csv_text.strip()))
-                required_cols = {"instance_type", "vcpus", "memory_gb", "region"}
-                if not required_cols.issubset(df_input.columns):
-                    st.error(
-                        f"❌ Missing required columns: {required_cols - set(df_input.columns)}"
+                valid, st.session_state.ec2_csv_errors = validate_ec2_inventory(df_input)
+                if not valid.empty:
+                    start_job(
+                        "ec2_csv_job",
+                        "ec2_comparison",
+                        run_ec2_job,
+                        valid.to_dict(orient="records"),
                     )
-                else:
-                    results = []
-                    for row in df_input.to_dict(orient="records"):
-                        candidate_list = fetch_ec2_comparison(
-                            row["instance_type"],
-                            int(row["vcpus"]),
-                            float(row["memory_gb"]),
-                            row["region"],
-                        )
-                        results.extend(candidate_list)  # flatten the list
-
-                    df = pd.DataFrame(results)
-                    st.session_state.ec2_full_results_csv = df
-                    st.session_state.ec2_filtered_csv = False
-                    st.success("✅ EC2 comparison complete.")
             except Exception as e:
                 st.error(f"❌ Error processing input: {e}")
 
+        if st.session_state.get("ec2_csv_errors") is not None:
+            show_validation_errors(st.session_state.ec2_csv_errors)
+
+        csv_job = poll_job("ec2_csv_job")
+        if csv_job is not None:
+            if csv_job.status == "failed":
+                st.error(f"❌ Error processing input: {csv_job.error}")
+            else:
+                st.session_state.ec2_full_results_csv = get_result_store().put(
+                    pd.DataFrame(csv_job.result["results"])
+                )
+                st.session_state.ec2_full_plan_csv = csv_job.result["plan"]
+                st.session_state.ec2_filtered_csv = False
+                st.success("✅ EC2 comparison complete.")
+
         def set_ec2_filtered_csv_true():
             st.session_state.ec2_filtered_csv = True
 
@@ -242,39 +207,8 @@ def main():
             st.session_state.ec2_filtered_csv = False
 
         if st.session_state.ec2_full_results_csv is not None:
-            df = st.session_state.ec2_full_results_csv.copy()
-            if st.session_state.ec2_filtered_csv:
-                df["candidate_monthly_raw"] = (
-                    df["candidate_monthly"]
-                    .replace("[\$,]", "", regex=True)
-                    .astype(float)
-                )
-                df_filtered = df.dropna(subset=["input_type", "region", "candidate_monthly_raw"])
-                if not df_filtered.empty:
-                    filtered_df = df_filtered.loc[
-                        df_filtered.groupby(["input_type", "region"])[
-                            "candidate_monthly_raw"
-                        ].idxmin()
-                    ]
-                    st.dataframe(filtered_df.drop(columns=["candidate_monthly_raw"]))
-                    st.download_button(
-                        "Download CSV (Filtered)",
-                        filtered_df.drop(columns=["candidate_monthly_raw"]).to_csv(
-                            index=False
-                        ),
-                        "ec2_comparison_filtered.csv",
-                        "text/csv",
-                    )
-                else:
-                    st.warning("No valid rows to filter.")
-            else:
-                st.dataframe(df)
-                st.download_button(
-                    "Download CSV",
-                    df.to_csv(index=False),
-                    "ec2_comparison.csv",
-                    "text/csv",
-                )
+            show_results(st.session_state.ec2_full_results_csv, st.session_state.ec2_filtered_csv)
+            show_query_plan(st.session_state.get("ec2_full_plan_csv"))
             col1, col2 = st.columns(2)
             col1.button(
                 "🔍 Filter Cheapest Option",
@@ -295,26 +229,40 @@ def main():
         if "ec2_filtered_upload" not in st.session_state:
             st.session_state.ec2_filtered_upload = False
 
-        if uploaded_file is not None:
+        # Reruns keep the same upload, only submit a job for a new file
+        if (
+            uploaded_file is not None
+            and st.session_state.get("ec2_upload_file_id") != uploaded_file.file_id
+        ):
+            st.session_state.ec2_upload_file_id = uploaded_file.file_id
+            st.session_state.ec2_upload_errors = None
             try:
                 df_input = pd.read_csv(uploaded_file)
-                entries = [
-                    EC2ExtendedEntry(**row)
-                    for row in df_input.to_dict(orient="records")
-                ]
-                results = []
-                for e in entries:
-                    candidate_list = fetch_ec2_comparison(
-                        e.instance_type, e.vcpus, e.memory_gb, e.region
+                valid, st.session_state.ec2_upload_errors = validate_ec2_inventory(df_input)
+                if not valid.empty:
+                    start_job(
+                        "ec2_upload_job",
+                        "ec2_comparison",
+                        run_ec2_job,
+                        valid.to_dict(orient="records"),
                     )
-                    results.extend(candidate_list)  # flatten the list
+            except Exception as e:
+                st.error(f"❌ Failed to process CSV: {e}")
 
-                df = pd.DataFrame(results)
-                st.session_state.ec2_full_results_upload = df
+        if st.session_state.get("ec2_upload_errors") is not None:
+            show_validation_errors(st.session_state.ec2_upload_errors)
+
+        upload_job = poll_job("ec2_upload_job")
+        if upload_job is not None:
+            if upload_job.status == "failed":
+                st.error(f"❌ Failed to process CSV: {upload_job.error}")
+            else:
+                st.session_state.ec2_full_results_upload = get_result_store().put(
+                    pd.DataFrame(upload_job.result["results"])
+                )
+                st.session_state.ec2_full_plan_upload = upload_job.result["plan"]
                 st.session_state.ec2_filtered_upload = False
                 st.success("✅ EC2 comparison complete.")
-            except Exception as e:
-                st.error(f"❌ Failed to process CSV: {e}")
 
         def set_ec2_filtered_upload_true():
             st.session_state.ec2_filtered_upload = True
@@ -323,39 +271,8 @@ def main():
             st.session_state.ec2_filtered_upload = False
 
         if st.session_state.ec2_full_results_upload is not None:
-            df = st.session_state.ec2_full_results_upload.copy()
-            if st.session_state.ec2_filtered_upload:
-                df["candidate_monthly_raw"] = (
-                    df["candidate_monthly"]
-                    .replace("[\$,]", "", regex=True)
-                    .astype(float)
-                )
-                df_filtered = df.dropna(subset=["input_type", "region", "candidate_monthly_raw"])
-                if not df_filtered.empty:
-                    filtered_df = df_filtered.loc[
-                        df_filtered.groupby(["input_type", "region"])[
-                            "candidate_monthly_raw"
-                        ].idxmin()
-                    ]
-                    st.dataframe(filtered_df.drop(columns=["candidate_monthly_raw"]))
-                    st.download_button(
-                        "Download CSV (Filtered)",
-                        filtered_df.drop(columns=["candidate_monthly_raw"]).to_csv(
-                            index=False
-                        ),
-                        "ec2_comparison_filtered.csv",
-                        "text/csv",
-                    )
-                else:
-                    st.warning("No valid rows to filter.")
-            else:
-                st.dataframe(df)
-                st.download_button(
-                    "Download CSV",
-                    df.to_csv(index=False),
-                    "ec2_comparison.csv",
-                    "text/csv",
-                )
+            show_results(st.session_state.ec2_full_results_upload, st.session_state.ec2_filtered_upload)
+            show_query_plan(st.session_state.get("ec2_full_plan_upload"))
             col1, col2 = st.columns(2)
             col1.button(
                 "🔍 Filter Cheapest Option",
@@ -2,7 +2,10 @@ import streamlit as st
 import pandas as pd
 import json
 from utils.auth import show_authentication
-from utils.pricing import fetch_rds_price
+from utils.pricing import run_rds_job
+from utils.job_ui import start_job, poll_job, show_query_plan, show_validation_errors
+from utils.cur import weight_rds_results
+from utils.validation import validate_rds_entries
 from utils.models import Entry
 from pydantic import BaseModel, ValidationError
 from typing import Literal
@@ -25,6 +28,32 @@ def main():
         start: str
         end: str
 
+    def show_results(job, results_key, error_prefix):
+        # poll_job hands the finished job over once; keep its result so
+        # later reruns (downloads, other widgets) still show the table
+        if job is not None:
+            if job.status == "failed":
+                st.error(f"{error_prefix}: {job.error}")
+                st.session_state[results_key] = None
+            else:
+                st.session_state[results_key] = job.result
+                st.success("✅ Pricing analysis complete.")
+
+        result = st.session_state.get(results_key)
+        if result is None:
+            return
+        df = weight_rds_results(
+            pd.DataFrame(result["results"]), st.session_state.get("cur_usage")
+        )
+        st.dataframe(df)
+        st.download_button(
+            "Download CSV",
+            df.to_csv(index=False),
+            "rds_pricing.csv",
+            "text/csv",
+        )
+        show_query_plan(result["plan"])
+
     if input_mode == "Fill In Form":
         st.subheader("📄 Add Entries One by One")
 
@@ -66,19 +95,12 @@ def main():
         if run_clicked:
             try:
                 parsed_entries = [Entry(**e) for e in st.session_state.entry_list]
-                results = [fetch_rds_price(entry) for entry in parsed_entries]
-                df = pd.DataFrame(results)
-                st.success("✅ Pricing analysis complete.")
-                st.dataframe(df)
-                st.download_button(
-                    "Download CSV",
-                    df.to_csv(index=False),
-                    "rds_pricing.csv",
-                    "text/csv",
-                )
+                start_job("rds_form_job", "rds_pricing", run_rds_job, parsed_entries)
             except Exception as e:
                 st.error(f"❌ Error during processing: {e}")
 
+        show_results(poll_job("rds_form_job"), "rds_form_results", "❌ Error during processing")
+
     elif input_mode == "Manual JSON Input":
         st.subheader("📝 Paste JSON Data")
 
@@ -98,41 +120,43 @@ def main():
         )
 
         if st.button("✅ Run Pricing Analysis"):
+            # A parse error must not leave the previous row report up
+            st.session_state.rds_json_errors = None
             try:
                 parsed_input = json.loads(user_input)
-                entries = [Entry(**entry) for entry in parsed_input]
-                results = [fetch_rds_price(entry) for entry in entries]
-                df = pd.DataFrame(results)
-                st.success("✅ Pricing analysis complete.")
-                st.dataframe(df)
-                st.download_button(
-                    "Download CSV",
-                    df.to_csv(index=False),
-                    "rds_pricing.csv",
-                    "text/csv",
-                )
-            except (json.JSONDecodeError, ValidationError) as e:
+                entries, st.session_state.rds_json_errors = validate_rds_entries(parsed_input)
+                if entries:
+                    start_job("rds_json_job", "rds_pricing", run_rds_job, entries)
+            except (json.JSONDecodeError, ValueError) as e:
                 st.error(f"❌ Error parsing input: {e}")
 
+        if st.session_state.get("rds_json_errors") is not None:
+            show_validation_errors(st.session_state.rds_json_errors)
+
+        show_results(poll_job("rds_json_job"), "rds_json_results", "❌ Error parsing input")
+
     elif input_mode == "JSON Upload":
         st.subheader("📁 Upload JSON File")
 
         uploaded_file = st.file_uploader("Upload your JSON file", type="json")
 
-        if uploaded_file is not None:
+        # Reruns keep the same upload, only submit a job for a new file
+        if (
+            uploaded_file is not None
+            and st.session_state.get("rds_upload_file_id") != uploaded_file.file_id
+        ):
+            st.session_state.rds_upload_file_id = uploaded_file.file_id
+            st.session_state.rds_upload_errors = None
             try:
                 raw_data = uploaded_file.read()
                 parsed_input = json.loads(raw_data)
-                entries = [Entry(**entry) for entry in parsed_input]
-                results = [fetch_rds_price(entry) for entry in entries]
-                df = pd.DataFrame(results)
-                st.success("✅ Pricing analysis complete.")
-                st.dataframe(df)
-                st.download_button(
-                    "Download CSV",
-                    df.to_csv(index=False),
-                    "rds_pricing.csv",
-                    "text/csv",
-                )
-            except (json.JSONDecodeError, ValidationError) as e:
-                st.error(f"❌ Invalid JSON file: {e}")
\ No newline at end of file
+                entries, st.session_state.rds_upload_errors = validate_rds_entries(parsed_input)
+                if entries:
+                    start_job("rds_upload_job", "rds_pricing", run_rds_job, entries)
+            except (json.JSONDecodeError, ValueError) as e:
+                st.error(f"❌ Invalid JSON file: {e}")
+
+        if st.session_state.get("rds_upload_errors") is not None:
+            show_validation_errors(st.session_state.rds_upload_errors)
+
+        show_results(poll_job("rds_upload_job"), "rds_upload_results", "❌ Invalid JSON file")
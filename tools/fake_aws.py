@@ -0,0 +1,244 @@
+"""
+In-process fake of the AWS APIs the app calls, for load testing without an
+account. install() patches boto3.client so every page and background job
+talks to these fakes.
+"""
+import json
+import random
+import time
+from datetime import timedelta
+import boto3
+
+# family -> (GiB per vCPU, USD per vCPU-hour)
+FAMILIES = {
+    "m5": (4, 0.048),
+    "m6g": (4, 0.0385),
+    "m7g": (4, 0.0408),
+    "c5": (2, 0.0425),
+    "c6g": (2, 0.034),
+    "c7g": (2, 0.0363),
+    "r5": (8, 0.063),
+    "r6g": (8, 0.0504),
+}
+SIZES = {"large": 2, "xlarge": 4, "2xlarge": 8, "4xlarge": 16}
+PAGE_SIZE = 100
+
+
+def _on_demand(price: float) -> dict:
+    return {
+        "OnDemand": {
+            "TERM.OD": {
+                "priceDimensions": {
+                    "DIM.OD": {"unit": "Hrs", "pricePerUnit": {"USD": f"{price:.4f}"}}
+                }
+            }
+        }
+    }
+
+
+def _reserved_term(option: str, upfront: float, hourly: float) -> dict:
+    return {
+        "termAttributes": {"PurchaseOption": option, "LeaseContractLength": "1yr"},
+        "priceDimensions": {
+            "DIM.Q": {"unit": "Quantity", "pricePerUnit": {"USD": f"{upfront:.2f}"}},
+            "DIM.H": {"unit": "Hrs", "pricePerUnit": {"USD": f"{hourly:.4f}"}},
+        },
+    }
+
+
+def _ec2_product(instance_type: str, vcpus: int, memory_gb: float, price: float, region_code: str, sku: str) -> str:
+    return json.dumps(
+        {
+            "product": {
+                "sku": sku,
+                "productFamily": "Compute Instance",
+                "attributes": {
+                    "instanceType": instance_type,
+                    "vcpu": str(vcpus),
+                    "memory": f"{memory_gb:g} GiB",
+                    "regionCode": region_code,
+                    "operatingSystem": "Linux",
+                    "tenancy": "Shared",
+                    # Real PriceList documents carry dozens of attributes
+                    "description": "x" * 2000,
+                },
+            },
+            "terms": _on_demand(price),
+        }
+    )
+
+
+RDS_TYPES = ["db.t3.medium", "db.m5.large", "db.m5.xlarge", "db.r5.large", "db.r5.xlarge"]
+RDS_ENGINES = ["PostgreSQL", "MariaDB", "MySQL"]
+RDS_DEPLOYMENTS = ["Single-AZ", "Multi-AZ"]
+# Attributes the fake catalogue varies; other filters match every product
+FILTERED_ATTRIBUTES = ("instanceType", "vcpu", "memory", "databaseEngine", "deploymentOption")
+
+
+def _rds_product(instance_type: str, engine: str, deployment: str, region_code: str) -> str:
+    vcpus = SIZES.get(instance_type.split(".")[-1], 2)
+    od = 0.05 * vcpus * (2 if deployment == "Multi-AZ" else 1)
+    terms = _on_demand(od)
+    terms["Reserved"] = {
+        "NU": _reserved_term("No Upfront", 0.0, od * 0.7),
+        "PU": _reserved_term("Partial Upfront", od * 0.3 * 8760, od * 0.32),
+        "AU": _reserved_term("All Upfront", od * 0.62 * 8760, 0.0),
+    }
+    return json.dumps(
+        {
+            "product": {
+                "productFamily": "Database Instance",
+                "attributes": {
+                    "instanceType": instance_type,
+                    "regionCode": region_code,
+                    "databaseEngine": engine,
+                    "deploymentOption": deployment,
+                },
+            },
+            "terms": terms,
+        }
+    )
+
+
+def _matches(item: str, values: dict) -> bool:
+    # TERM_MATCH is case-insensitive
+    attributes = json.loads(item)["product"]["attributes"]
+    return all(str(attributes.get(f, "")).lower() == v.lower() for f, v in values.items())
+
+
+class FakePricingClient:
+    def __init__(self, latency: float, catalog_pages: int):
+        self.latency = latency
+        self.catalog_pages = catalog_pages
+
+    def get_products(self, ServiceCode, Filters, **kwargs):
+        time.sleep(self.latency)
+        values = {f["Field"]: f["Value"] for f in Filters}
+        # Any RDS instance type is "offered", so targeted lookups always hit
+        product = _rds_product(
+            values.get("instanceType", "db.t3.medium"),
+            values.get("databaseEngine", "PostgreSQL"),
+            values.get("deploymentOption", "Single-AZ"),
+            values.get("regionCode"),
+        )
+        return {"PriceList": [product]}
+
+    def get_paginator(self, name):
+        return FakeProductsPaginator(self)
+
+
+class FakeProductsPaginator:
+    def __init__(self, client: FakePricingClient):
+        self.client = client
+
+    def _ec2_catalog(self, region_code: str) -> list:
+        items = [
+            _ec2_product(f"{family}.{size}", vcpus, vcpus * ratio, vcpus * price, region_code, f"{family}.{size}")
+            for family, (ratio, price) in FAMILIES.items()
+            for size, vcpus in SIZES.items()
+        ]
+        # Pad the catalogue with non-matching variants up to catalog_pages
+        filler = 0
+        while len(items) < self.client.catalog_pages * PAGE_SIZE:
+            items.append(_ec2_product(f"x{filler}.large", 3, 5.0, 0.1, region_code, f"filler-{filler}"))
+            filler += 1
+        return items
+
+    def paginate(self, ServiceCode, Filters, **kwargs):
+        values = {f["Field"]: f["Value"] for f in Filters}
+        region_code = values.get("regionCode")
+        if ServiceCode == "AmazonRDS":
+            items = [
+                _rds_product(instance_type, engine, deployment, region_code)
+                for instance_type in RDS_TYPES
+                for engine in RDS_ENGINES
+                for deployment in RDS_DEPLOYMENTS
+            ]
+        else:
+            items = self._ec2_catalog(region_code)
+        # Honour the attribute filters the query planner narrows queries with
+        wanted = {f: v for f, v in values.items() if f in FILTERED_ATTRIBUTES}
+        items = [item for item in items if _matches(item, wanted)]
+        for start in range(0, len(items), PAGE_SIZE):
+            time.sleep(self.client.latency)
+            yield {"PriceList": items[start:start + PAGE_SIZE]}
+
+
+class FakeEC2Client:
+    def __init__(self, latency: float, region: str):
+        self.latency = latency
+        self.region = region
+
+    def describe_instances(self, **kwargs):
+        time.sleep(self.latency)
+        instances = [
+            {
+                "InstanceId": f"i-{self.region}-{i}",
+                "InstanceType": instance_type,
+                "CpuOptions": {"CoreCount": SIZES[instance_type.split(".")[1]] // 2, "ThreadsPerCore": 2},
+            }
+            for i, instance_type in enumerate(["m5.large", "c5.xlarge", "r5.2xlarge"])
+        ]
+        return {"Reservations": [{"Instances": instances}]}
+
+    def describe_instance_types(self, InstanceTypes, **kwargs):
+        time.sleep(self.latency)
+        family, size = InstanceTypes[0].split(".")
+        memory_gb = SIZES[size] * FAMILIES[family][0]
+        return {"InstanceTypes": [{"MemoryInfo": {"SizeInMiB": memory_gb * 1024}}]}
+
+    def describe_instance_status(self, InstanceIds, **kwargs):
+        time.sleep(self.latency)
+        return {"InstanceStatuses": []}
+
+    def describe_availability_zones(self, **kwargs):
+        time.sleep(self.latency)
+        return {
+            "AvailabilityZones": [{"ZoneName": f"{self.region}{suffix}"} for suffix in "abc"]
+        }
+
+    def get_paginator(self, name):
+        return FakeSpotHistoryPaginator(self)
+
+
+class FakeSpotHistoryPaginator:
+    """Hourly spot price changes at 25-40% of on-demand, 1000 per page."""
+
+    def __init__(self, client: FakeEC2Client):
+        self.client = client
+
+    def paginate(self, AvailabilityZone, InstanceTypes, StartTime, **kwargs):
+        rng = random.Random(AvailabilityZone)
+        records = []
+        for instance_type in InstanceTypes:
+            family, _, size = instance_type.partition(".")
+            od = SIZES.get(size, 2) * FAMILIES.get(family, (0, 0.05))[1]
+            for hour in range(24 * 7):
+                records.append(
+                    {
+                        "AvailabilityZone": AvailabilityZone,
+                        "InstanceType": instance_type,
+                        "ProductDescription": "Linux/UNIX",
+                        "SpotPrice": f"{od * rng.uniform(0.25, 0.4):.6f}",
+                        "Timestamp": StartTime + timedelta(hours=hour),
+                    }
+                )
+                if len(records) == 1000:
+                    time.sleep(self.client.latency)
+                    yield {"SpotPriceHistory": records}
+                    records = []
+        time.sleep(self.client.latency)
+        yield {"SpotPriceHistory": records}
+
+
+def install(latency: float = 0.05, catalog_pages: int = 20) -> None:
+    """Routes boto3.client("pricing" | "ec2") to the fakes."""
+
+    def fake_client(service_name, region_name=None, **kwargs):
+        if service_name == "pricing":
+            return FakePricingClient(latency, catalog_pages)
+        if service_name == "ec2":
+            return FakeEC2Client(latency, region_name)
+        raise ValueError(f"No fake for AWS service {service_name}")
+
+    boto3.client = fake_client
@@ -0,0 +1,221 @@
+"""
+Multi-user load test for the EC2 and RDS pages.
+
+Simulated analysts drive the pages headlessly through Streamlit's AppTest
+API against the in-process fake AWS backend (tools/fake_aws.py), sharing
+one background job pool and result store like sessions of one server.
+
+    python tools/load_test.py --users 1,2,4,8 --iterations 3
+
+AppTest swaps a process-global runtime on every run, so script runs are
+serialized behind a lock (Streamlit script threads contend on the GIL
+anyway); background jobs still run concurrently. Latency is measured from
+the click until the results are rendered, including that queueing.
+"""
+import argparse
+import atexit
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+import fake_aws  # noqa: E402
+
+# Harness threads touch AppTest outside a script run, which is expected here
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: False
+)
+
+# Guarded: spawned decode workers re-import the running script as __mp_main__
+PAGE_SCRIPT = """
+import sys
+sys.path.insert(0, {root!r})
+from app_pages import {page}
+if __name__ == "__main__":
+    {page}.main()
+"""
+
+_run_lock = threading.Lock()
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak RSS only, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class SimulatedUser:
+    def __init__(self, poll_interval: float, timeout: float):
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def _app(self, page: str) -> AppTest:
+        # from_string (re)writes a shared temp script file
+        with _run_lock:
+            return AppTest.from_string(
+                PAGE_SCRIPT.format(root=ROOT, page=page), default_timeout=self.timeout
+            )
+
+    def _run(self, at: AppTest, action: Callable[[AppTest], None] = None) -> None:
+        with _run_lock:
+            if action:
+                action(at)
+            at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+    def _interact(self, name: str, at: AppTest, action, done: Callable[[AppTest], bool]) -> None:
+        started = time.perf_counter()
+        self._run(at, action)
+        while not done(at):
+            if time.perf_counter() - started > self.timeout:
+                raise TimeoutError(f"{name} did not finish within {self.timeout}s")
+            time.sleep(self.poll_interval)
+            self._run(at)
+        self.latencies[name].append(time.perf_counter() - started)
+
+    def ec2_session(self) -> None:
+        at = self._app("ec2_analysis")
+        self._run(at)
+        self._run(at, lambda at: at.radio[0].set_value("Paste CSV Text"))
+        self._interact(
+            "ec2_compare",
+            at,
+            lambda at: at.button(key="run_csv_text").click(),
+            lambda at: len(at.dataframe) > 0,
+        )
+        self._interact(
+            "ec2_filter",
+            at,
+            lambda at: at.button(key="filter_csv").click(),
+            lambda at: len(at.dataframe) > 0,
+        )
+
+    def rds_session(self) -> None:
+        at = self._app("rds_analysis")
+        self._run(at)
+        self._run(at, lambda at: at.radio[0].set_value("Manual JSON Input"))
+        self._interact(
+            "rds_pricing",
+            at,
+            lambda at: at.button[0].click(),
+            lambda at: len(at.dataframe) > 0,
+        )
+
+
+def run_level(users: int, iterations: int, poll_interval: float, timeout: float) -> Dict:
+    simulated = [SimulatedUser(poll_interval, timeout) for _ in range(users)]
+    errors: List[str] = []
+
+    def work(user: SimulatedUser) -> None:
+        for _ in range(iterations):
+            try:
+                user.ec2_session()
+                user.rds_session()
+            except Exception as e:
+                errors.append(str(e))
+
+    cpu_before, rss_before = _cpu_seconds(), _rss_mb()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(u,)) for u in simulated]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    cpu_used, rss_after = _cpu_seconds() - cpu_before, _rss_mb()
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    for user in simulated:
+        for name, values in user.latencies.items():
+            latencies[name].extend(values)
+    completed = sum(len(v) for v in latencies.values())
+
+    return {
+        "users": users,
+        "latencies": latencies,
+        "throughput": completed / elapsed,
+        "cpu_per_user": cpu_used / users,
+        "rss_mb": rss_after,
+        "rss_per_user": (rss_after - rss_before) / users,
+        "errors": errors,
+    }
+
+
+def print_report(levels: List[Dict]) -> None:
+    header = f"{'users':>5} {'interaction':<12} {'n':>4} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7}"
+    print(header)
+    print("-" * len(header))
+    for level in levels:
+        for name, values in sorted(level["latencies"].items()):
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            print(f"{level['users']:>5} {name:<12} {len(values):>4} {p50:>7.2f} {p95:>7.2f} {p99:>7.2f}")
+    print()
+    header = f"{'users':>5} {'interactions/s':>14} {'CPU s/user':>10} {'RSS MB':>8} {'+MB/user':>8} {'errors':>6}"
+    print(header)
+    print("-" * len(header))
+    for level in levels:
+        print(
+            f"{level['users']:>5} {level['throughput']:>14.2f} {level['cpu_per_user']:>10.2f} "
+            f"{level['rss_mb']:>8.1f} {level['rss_per_user']:>8.2f} {len(level['errors']):>6}"
+        )
+    for level in levels:
+        for error in sorted(set(level["errors"])):
+            print(f"[{level['users']} users] {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=2, help="EC2 + RDS sessions per user")
+    parser.add_argument("--latency-ms", type=float, default=50, help="fake AWS latency per call")
+    parser.add_argument("--catalog-pages", type=int, default=20, help="fake EC2 PriceList pages per region")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="seconds between page reruns while waiting")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before an interaction fails")
+    args = parser.parse_args()
+
+    # Keep jobs away from the real .jobs directory
+    if "FINOPS_JOB_DIR" not in os.environ:
+        job_dir = tempfile.mkdtemp(prefix="finops-loadtest-")
+        atexit.register(shutil.rmtree, job_dir, ignore_errors=True)
+        os.environ["FINOPS_JOB_DIR"] = job_dir
+    fake_aws.install(latency=args.latency_ms / 1000, catalog_pages=args.catalog_pages)
+
+    # Unmeasured warm-up: imports, the decode pool and the job directory
+    # would otherwise be charged to the first concurrency level
+    print("Warming up...", file=sys.stderr)
+    warmup = run_level(1, 1, args.poll_interval, args.timeout)
+    if warmup["errors"]:
+        print(f"Warm-up failed: {warmup['errors'][0]}", file=sys.stderr)
+
+    levels = []
+    for users in [int(u) for u in args.users.split(",")]:
+        print(f"Running {users} simulated user(s)...", file=sys.stderr)
+        levels.append(run_level(users, args.iterations, args.poll_interval, args.timeout))
+    print_report(levels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .helpers import (
+    format_currency,
+    format_percent,
+    option_key,
+    HOURS_PER_MONTH,
+    REGION_MAP,
+    RESERVATION_OPTIONS,
+)
+
+CUR_CHUNK_ROWS = 200_000
+# Reports are only read from this server-side directory
+CUR_DIR = os.getenv("FINOPS_CUR_DIR", "cur")
+CUR_SUFFIXES = (".csv", ".csv.gz", ".parquet")
+
+# Canonical column -> names used by the legacy CSV and the Parquet/Athena CUR
+CUR_COLUMNS = {
+    "product_code": ["lineItem/ProductCode", "line_item_product_code"],
+    "line_item_type": ["lineItem/LineItemType", "line_item_line_item_type"],
+    "usage_amount": ["lineItem/UsageAmount", "line_item_usage_amount"],
+    "usage_start": ["lineItem/UsageStartDate", "line_item_usage_start_date"],
+    "usage_end": ["lineItem/UsageEndDate", "line_item_usage_end_date"],
+    "resource_id": ["lineItem/ResourceId", "line_item_resource_id"],
+    "pricing_unit": ["pricing/unit", "pricing_unit"],
+    "instance_type": ["product/instanceType", "product_instance_type"],
+    "region_code": ["product/region", "product_region", "product_region_code"],
+}
+REQUIRED_COLUMNS = {"product_code", "line_item_type", "usage_amount", "instance_type", "region_code"}
+
+USAGE_LINE_TYPES = {"Usage", "DiscountedUsage", "SavingsPlanCoveredUsage"}
+SERVICES = {"AmazonEC2": "EC2", "AmazonRDS": "RDS"}
+
+
+def _rename_map(columns) -> Dict[str, str]:
+    renames = {}
+    for canonical, names in CUR_COLUMNS.items():
+        for name in names:
+            if name in columns:
+                renames[name] = canonical
+                break
+    missing = REQUIRED_COLUMNS - set(renames.values())
+    if missing:
+        raise ValueError(f"Not a Cost and Usage Report, missing columns: {sorted(missing)}")
+    return renames
+
+
+def read_cur_chunks(
+    path: str, chunk_rows: int = CUR_CHUNK_ROWS
+) -> Iterator[Tuple[pd.DataFrame, float]]:
+    """
+    Yields a CUR file (.csv, .csv.gz or .parquet) as bounded DataFrame
+    chunks holding only the columns the usage aggregation needs, renamed to
+    their canonical names, each with the fraction of the file read so far.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet reports requires pyarrow (pip install pyarrow)")
+        parquet_file = pq.ParquetFile(path)
+        renames = _rename_map(parquet_file.schema_arrow.names)
+        total_rows = parquet_file.metadata.num_rows or 1
+        rows_read = 0
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=list(renames)):
+            rows_read += batch.num_rows
+            yield batch.to_pandas().rename(columns=renames), rows_read / total_rows
+        return
+
+    header = pd.read_csv(path, nrows=0).columns
+    renames = _rename_map(header)
+    size = os.path.getsize(path) or 1
+    # Progress is the position in the file on disk, i.e. compressed bytes
+    # for .csv.gz, which is what the reader has consumed
+    with open(path, "rb") as raw:
+        reader = pd.read_csv(
+            raw,
+            usecols=list(renames),
+            chunksize=chunk_rows,
+            dtype=str,
+            compression="gzip" if path.endswith(".gz") else None,
+        )
+        for chunk in reader:
+            yield chunk.rename(columns=renames), min(raw.tell() / size, 1.0)
+
+
+def aggregate_usage_hours(
+    path: str, chunk_rows: int = CUR_CHUNK_ROWS, progress=None
+) -> pd.DataFrame:
+    """
+    Streams a CUR file and returns the instance usage hours per (service,
+    instance type, region), with the number of distinct resources and
+    their average utilization over the report period.
+    """
+    hours: Dict[Tuple[str, str, str], float] = {}
+    resources: Dict[Tuple[str, str, str], Set[str]] = {}
+    period_start, period_end = None, None
+    rows_read = 0
+
+    for chunk, fraction in read_cur_chunks(path, chunk_rows):
+        rows_read += len(chunk)
+        if progress:
+            progress(fraction, f"Read {rows_read:,} report lines")
+
+        usage = chunk[
+            chunk["product_code"].isin(SERVICES)
+            & chunk["line_item_type"].isin(USAGE_LINE_TYPES)
+            & chunk["instance_type"].notna()
+            & (chunk["instance_type"] != "")
+        ]
+        if "pricing_unit" in usage:
+            usage = usage[usage["pricing_unit"].isin(["Hrs", "Hours"])]
+        if usage.empty:
+            continue
+
+        usage = usage.assign(
+            usage_amount=pd.to_numeric(usage["usage_amount"], errors="coerce").fillna(0.0)
+        )
+        keys = ["product_code", "instance_type", "region_code"]
+        for key, amount in usage.groupby(keys)["usage_amount"].sum().items():
+            hours[key] = hours.get(key, 0.0) + amount
+        if "resource_id" in usage:
+            for key, ids in usage.groupby(keys)["resource_id"].unique().items():
+                resources.setdefault(key, set()).update(i for i in ids if isinstance(i, str) and i)
+
+        if "usage_start" in usage and "usage_end" in usage:
+            starts = pd.to_datetime(usage["usage_start"], errors="coerce", utc=True)
+            ends = pd.to_datetime(usage["usage_end"], errors="coerce", utc=True)
+            period_start = starts.min() if period_start is None else min(period_start, starts.min())
+            period_end = ends.max() if period_end is None else max(period_end, ends.max())
+
+    if period_start is not None and pd.notna(period_start) and pd.notna(period_end):
+        period_hours = (period_end - period_start).total_seconds() / 3600
+    else:
+        # Without usage dates assume a monthly report
+        period_hours = HOURS_PER_MONTH
+
+    records = []
+    for (product_code, instance_type, region_code), usage_hours in hours.items():
+        resource_count = len(resources.get((product_code, instance_type, region_code), ())) or 1
+        records.append(
+            {
+                "service": SERVICES[product_code],
+                "instance_type": instance_type,
+                "region_code": region_code,
+                "usage_hours": usage_hours,
+                "resource_count": resource_count,
+                "utilization": min(usage_hours / (period_hours * resource_count), 1.0),
+            }
+        )
+    return pd.DataFrame(
+        records,
+        columns=["service", "instance_type", "region_code", "usage_hours", "resource_count", "utilization"],
+    )
+
+
+def resolve_cur_path(name: str, cur_dir: str = CUR_DIR) -> str:
+    """
+    Resolves a report name relative to cur_dir, following symlinks, and
+    raises ValueError for anything that ends up outside of it.
+    """
+    root = os.path.realpath(cur_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or not path.endswith(CUR_SUFFIXES):
+        raise ValueError(f"Reports must be {', '.join(CUR_SUFFIXES)} files under {cur_dir}")
+    return path
+
+
+def list_cur_files(cur_dir: str = CUR_DIR) -> List[str]:
+    """CUR files under cur_dir that resolve_cur_path accepts, relative to it."""
+    files = []
+    for root, _, names in os.walk(cur_dir):
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), cur_dir)
+            try:
+                resolve_cur_path(relative, cur_dir)
+            except ValueError:
+                continue
+            files.append(relative)
+    return sorted(files)
+
+
+def load_usage_records(name: str, progress=None) -> List[Dict]:
+    """
+    Job entry point: aggregate_usage_hours of a report under CUR_DIR, as
+    JSON-serializable records.
+    """
+    return aggregate_usage_hours(resolve_cur_path(name), progress=progress).to_dict(orient="records")
+
+
+def _parse_currency(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values.replace(r"[\$,]", "", regex=True), errors="coerce")
+
+
+def _join_usage(
+    df: pd.DataFrame, usage: pd.DataFrame, service: str, type_column: str
+) -> pd.DataFrame:
+    service_usage = usage[usage["service"] == service].drop(columns=["service"])
+    service_usage = service_usage.rename(columns={"instance_type": type_column})
+    df = df.assign(region_code=df["region"].map(lambda r: REGION_MAP.get(r, r)))
+    merged = df.merge(service_usage, how="left", on=[type_column, "region_code"])
+    merged.index = df.index
+    return merged.drop(columns=["region_code"])
+
+
+def _format_column(values: np.ndarray, formatter) -> list:
+    return ["N/A" if np.isnan(v) else formatter(v) for v in values]
+
+
+def weight_ec2_results(df: pd.DataFrame, usage: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Adds CUR usage hours, utilization and utilization-weighted monthly
+    savings to fetch_ec2_comparison results. Returns a copy.
+    """
+    if usage is None or usage.empty or "savings_usd" not in df:
+        return df.copy()
+    merged = _join_usage(df, usage, "EC2", "input_type")
+    utilization = merged["utilization"].to_numpy(dtype=float)
+    weighted = _parse_currency(merged["savings_usd"]).to_numpy(dtype=float) * utilization
+
+    merged["usage_hours"] = _format_column(merged["usage_hours"].to_numpy(dtype=float), lambda v: f"{v:,.0f}")
+    merged["utilization"] = _format_column(utilization * 100, format_percent)
+    merged["weighted_savings_usd"] = _format_column(weighted, format_currency)
+    return merged.drop(columns=["resource_count"])
+
+
+def weight_rds_results(df: pd.DataFrame, usage: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Adds CUR utilization to fetch_rds_price results. On-demand cost scales
+    with actual usage while reservations are billed in full, so each option
+    gets a utilization-weighted economy. Returns a copy.
+    """
+    if usage is None or usage.empty or "on_demand_annual_usd" not in df:
+        return df.copy()
+    merged = _join_usage(df, usage, "RDS", "instance_type")
+    utilization = merged["utilization"].to_numpy(dtype=float)
+    weighted_od = _parse_currency(merged["on_demand_annual_usd"]).to_numpy(dtype=float) * utilization
+
+    merged["usage_hours"] = _format_column(merged["usage_hours"].to_numpy(dtype=float), lambda v: f"{v:,.0f}")
+    merged["utilization"] = _format_column(utilization * 100, format_percent)
+    merged["weighted_on_demand_annual_usd"] = _format_column(weighted_od, format_currency)
+    for term_type in RESERVATION_OPTIONS:
+        key = option_key(term_type)
+        reserved = _parse_currency(merged[f"{key}_reserved_annual_usd"]).to_numpy(dtype=float)
+        merged[f"{key}_weighted_economy_usd"] = _format_column(
+            weighted_od - reserved, format_currency
+        )
+    return merged.drop(columns=["resource_count"])
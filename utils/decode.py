@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+from .helpers import RESERVATION_OPTIONS, get_reserved_rates, option_key
+
+DECODE_WORKERS = int(os.getenv("FINOPS_DECODE_WORKERS", str(os.cpu_count() or 1)))
+# Pages submitted but not yet yielded, per decode_pages call
+DECODE_IN_FLIGHT = 2 * max(DECODE_WORKERS, 1)
+
+Extractor = Callable[[List[str]], List[Dict[str, Any]]]
+
+
+def _od_hourly(product: Dict) -> Optional[float]:
+    od_terms = product.get("terms", {}).get("OnDemand", {})
+    if not od_terms:
+        return None
+    od_term = list(od_terms.values())[0]
+    price_dim = list(od_term["priceDimensions"].values())[0]
+    return float(price_dim["pricePerUnit"]["USD"])
+
+
+def extract_ec2_records(items: List[str]) -> List[Dict[str, Any]]:
+    """
+    Decodes raw EC2 PriceList items into the compact records the Graviton
+    comparison needs. Items without vCPU/memory/type are dropped.
+    """
+    records = []
+    for item_str in items:
+        product = json.loads(item_str)
+        attr = product["product"]["attributes"]
+        if not all(k in attr for k in ["vcpu", "memory", "instanceType"]):
+            continue
+        try:
+            vcpus = int(attr["vcpu"])
+            memory_gb = float(attr["memory"].replace(" GiB", ""))
+        except Exception:
+            vcpus, memory_gb = None, None
+        records.append(
+            {
+                "instance_type": attr["instanceType"],
+                "region_code": attr.get("regionCode"),
+                "vcpus": vcpus,
+                "memory_gb": memory_gb,
+                "od_hourly": _od_hourly(product),
+            }
+        )
+    return records
+
+
+def extract_rds_records(items: List[str]) -> List[Dict[str, Any]]:
+    """
+    Decodes raw RDS PriceList items into their on-demand hourly rate and the
+    upfront/hourly rates of every 1yr reservation option.
+    """
+    records = []
+    for item_str in items:
+        product = json.loads(item_str)
+        attr = product.get("product", {}).get("attributes", {})
+        record = {
+            "instance_type": attr.get("instanceType"),
+            "region_code": attr.get("regionCode"),
+            "database_engine": attr.get("databaseEngine"),
+            "deployment_option": attr.get("deploymentOption"),
+            "od_hourly": _od_hourly(product),
+        }
+        reserved_terms = product.get("terms", {}).get("Reserved", {})
+        for term_type in RESERVATION_OPTIONS:
+            key = option_key(term_type)
+            upfront, hourly = get_reserved_rates(reserved_terms, term_type)
+            record[f"{key}_upfront"] = upfront
+            record[f"{key}_hourly"] = hourly
+        records.append(record)
+    return records
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_decode_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the process-wide decode pool, or None when FINOPS_DECODE_WORKERS
+    is 0 and pages should be decoded on the calling thread.
+    """
+    global _pool
+    if DECODE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking the threaded Streamlit server is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=DECODE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _release_items(entry: list, future: Future) -> None:
+    # Decoded: the raw page is no longer needed as an inline fallback
+    if not future.cancelled() and future.exception() is None:
+        entry[0] = None
+
+
+def _decode_next(pool: ProcessPoolExecutor, extract: Extractor, in_flight: Deque[list]) -> List[Dict[str, Any]]:
+    items, future = in_flight.popleft()
+    try:
+        return future.result()
+    except (BrokenProcessPool, CancelledError):
+        # A worker died (OOM, kill), here or in another job sharing the
+        # pool: replace the pool for later jobs and decode this page inline
+        _discard_pool(pool)
+        return extract(items)
+
+
+def decode_pages(
+    pages: Iterable[Dict[str, Any]], extract: Extractor
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the compact records of every get_products page, in page order.
+
+    Each page is handed to the decode pool as soon as it arrives, so the
+    next network request overlaps with decoding of the previous pages. At
+    most DECODE_IN_FLIGHT pages are pending at once, and a raw page is only
+    kept until its decode succeeds.
+    """
+    pool = get_decode_pool()
+    if pool is None:
+        for page in pages:
+            yield from extract(page["PriceList"])
+        return
+
+    # [raw items, future] pairs, oldest first
+    in_flight: Deque[list] = deque()
+    for page in pages:
+        if len(in_flight) >= DECODE_IN_FLIGHT:
+            yield from _decode_next(pool, extract, in_flight)
+        try:
+            future = pool.submit(extract, page["PriceList"])
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            while in_flight:
+                yield from _decode_next(pool, extract, in_flight)
+            yield from extract(page["PriceList"])
+            pool = get_decode_pool()
+            continue
+        entry = [page["PriceList"], future]
+        in_flight.append(entry)
+        future.add_done_callback(partial(_release_items, entry))
+    while in_flight:
+        yield from _decode_next(pool, extract, in_flight)
@@ -0,0 +1,78 @@
+import os
+import boto3
+from typing import Any, Callable, Dict, List, Optional
+from .helpers import REGION_MAP
+
+
+def discover_ec2_instances(
+    region_choice: str, progress: Optional[Callable[[float, str], None]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Lists running EC2 instances (type, vCPUs, memory) and their scheduled
+    events for one mapped region, or every mapped region for "All Regions".
+    """
+    # Use credentials from .env
+    access_key = os.getenv("AWS_ACCESS_KEY_ID")
+    secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+    # If All Regions, use all mapped regions
+    regions_to_query = []
+    if region_choice == "All Regions":
+        regions_to_query = list(REGION_MAP.values())
+    else:
+        regions_to_query = [REGION_MAP.get(region_choice, region_choice)]
+    all_instances = []
+    retirement_info = []
+    for i, reg in enumerate(regions_to_query):
+        if progress:
+            progress(i / len(regions_to_query), f"Scanning {reg}")
+        try:
+            ec2 = boto3.client(
+                "ec2",
+                region_name=reg,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+            )
+            reservations = ec2.describe_instances()["Reservations"]
+            instance_ids = []
+            for res in reservations:
+                for inst in res["Instances"]:
+                    instance_type = inst.get("InstanceType", "")
+                    vcpus = inst.get("CpuOptions", {}).get("CoreCount", 0) * inst.get("CpuOptions", {}).get("ThreadsPerCore", 1)
+                    memory_gb = None
+                    instance_id = inst.get("InstanceId", "")
+                    instance_ids.append(instance_id)
+                    # Try to get memory from instance type description
+                    try:
+                        type_info = ec2.describe_instance_types(InstanceTypes=[instance_type])
+                        memory_gb = type_info["InstanceTypes"][0]["MemoryInfo"]["SizeInMiB"] / 1024
+                    except Exception:
+                        memory_gb = None
+                    all_instances.append({
+                        "instance_type": instance_type,
+                        "vcpus": vcpus,
+                        "memory_gb": memory_gb,
+                        "region": reg,
+                        "instance_id": instance_id,
+                    })
+            # Get scheduled events for instances in this region
+            if instance_ids:
+                try:
+                    events = ec2.describe_instance_status(InstanceIds=instance_ids)["InstanceStatuses"]
+                    for status in events:
+                        instance_id = status.get("InstanceId", "")
+                        scheduled_events = status.get("Events", [])
+                        for event in scheduled_events:
+                            event_info = {
+                                "instance_id": instance_id,
+                                "region": reg,
+                                "event_code": event.get("Code", ""),
+                                "not_before": event.get("NotBefore", ""),
+                                "not_after": event.get("NotAfter", ""),
+                                "description": event.get("Description", ""),
+                            }
+                            retirement_info.append(event_info)
+                except Exception:
+                    pass
+        except Exception:
+            continue
+    return {"instances": all_instances, "retirement": retirement_info}
@@ -1,3 +1,5 @@
+from typing import Tuple
+
 REGION_MAP = {
     "Paris": "eu-west-3",
     "Frankfurt": "eu-central-1",
@@ -7,6 +9,12 @@ REGION_MAP = {
     "Oregon": "us-west-2",
 }
 
+HOURS_PER_YEAR = 24 * 365
+HOURS_PER_MONTH = HOURS_PER_YEAR / 12
+
+RESERVATION_OPTIONS = ["No Upfront", "Partial Upfront", "All Upfront"]
+
+
 def format_currency(value: float) -> str:
     return f"${value:,.2f}"
 
@@ -15,7 +23,15 @@ def format_percent(value: float) -> str:
     return f"{value:.2f}%"
 
 
-def get_reserved_price(terms, term_type: str) -> float:
+def option_key(term_type: str) -> str:
+    return term_type.lower().replace(" ", "_")
+
+
+def get_reserved_rates(terms, term_type: str) -> Tuple[float, float]:
+    """
+    Returns the (upfront, hourly) USD rates of the 1yr reservation
+    matching term_type, or (0.0, 0.0) when the term is not offered.
+    """
     for term in terms.values():
         attrs = term["termAttributes"]
         if (
@@ -31,11 +47,5 @@ def get_reserved_price(terms, term_type: str) -> float:
                     hourly = price
                 elif unit == "Quantity":
                     upfront = price
-            if term_type == "All Upfront":
-                return round(upfront, 2)
-            elif term_type == "Partial Upfront":
-                return round(upfront + hourly * 24 * 365, 2)
-            elif term_type == "No Upfront":
-                return round(hourly * 24 * 365, 2)
-    return 0.0
-
+            return upfront, hourly
+    return 0.0, 0.0
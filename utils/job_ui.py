@@ -0,0 +1,107 @@
+import os
+import pandas as pd
+import streamlit as st
+from typing import Any, Callable, Dict, List, Optional
+from .cur import CUR_DIR, list_cur_files, load_usage_records
+from .jobs import get_job_manager
+from .models import Job
+
+JOB_POLL_SECONDS = float(os.getenv("FINOPS_JOB_POLL_SECONDS", "1"))
+
+
+def start_job(state_key: str, kind: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+    """
+    Submits a background job and remembers its ID both in session state and
+    in the URL, so the job is picked up again after a reconnect.
+    """
+    job_id = get_job_manager().submit(kind, fn, *args, **kwargs)
+    st.session_state[state_key] = job_id
+    st.query_params[state_key] = job_id
+    return job_id
+
+
+def forget_job(state_key: str) -> None:
+    st.session_state.pop(state_key, None)
+    if state_key in st.query_params:
+        del st.query_params[state_key]
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _show_progress(job_id: str) -> None:
+    # Only this fragment reruns while waiting, the page itself stays idle
+    job = get_job_manager().get(job_id)
+    if job is None or job.status not in ("queued", "running"):
+        st.rerun()
+    st.progress(job.progress, text=job.message or "Waiting for a worker...")
+
+
+def poll_job(state_key: str) -> Optional[Job]:
+    """
+    Shows progress while the tracked job runs and reruns the page once it
+    ends. Returns the finished (done or failed) job exactly once.
+    """
+    job_id = st.session_state.get(state_key) or st.query_params.get(state_key)
+    if not job_id:
+        return None
+
+    job = get_job_manager().get(job_id)
+    if job is None:
+        forget_job(state_key)
+        return None
+
+    if job.status in ("queued", "running"):
+        st.session_state[state_key] = job_id
+        _show_progress(job_id)
+        return None
+
+    forget_job(state_key)
+    return job
+
+
+def show_usage_loader():
+    """Sidebar section to weight results by a Cost and Usage Report under CUR_DIR."""
+
+    def clear_usage():
+        st.session_state.cur_usage = None
+
+    st.sidebar.title("📊 Usage Weighting")
+    cur_files = list_cur_files()
+    if cur_files:
+        cur_file = st.sidebar.selectbox("CUR file (.csv.gz or .parquet)", cur_files)
+        if st.sidebar.button("Load usage"):
+            start_job("cur_job", "cur_ingest", load_usage_records, cur_file)
+    else:
+        st.sidebar.caption(f"Put Cost and Usage Reports under `{CUR_DIR}` on the server to weight results.")
+
+    with st.sidebar:
+        job = poll_job("cur_job")
+    if job is not None:
+        if job.status == "failed":
+            st.sidebar.error(f"❌ Failed to read report: {job.error}")
+        else:
+            st.session_state.cur_usage = pd.DataFrame(job.result)
+            # The page already rendered, rerun it with the usage applied
+            st.rerun()
+
+    usage = st.session_state.get("cur_usage")
+    if usage is not None:
+        st.sidebar.success(f"Usage loaded for {len(usage)} instance types.")
+        st.sidebar.button("Clear usage", on_click=clear_usage)
+
+
+def show_validation_errors(errors: pd.DataFrame) -> None:
+    """Warns about the invalid rows of a validation report and lists them."""
+    if errors.empty:
+        return
+    st.warning(f"⚠️ {errors['row'].nunique()} invalid row(s) skipped, the others are being priced.")
+    st.dataframe(errors)
+
+
+def show_query_plan(plan: Optional[List[Dict[str, Any]]]) -> None:
+    """Expander with the query plan of a pricing job and its call counts."""
+    if not plan:
+        return
+    expected = sum(step["expected_calls"] for step in plan)
+    actual = sum(step["actual_calls"] for step in plan)
+    with st.expander(f"Query plan: {actual} pricing API call(s), {expected} expected"):
+        st.dataframe(pd.DataFrame(plan))
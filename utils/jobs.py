@@ -0,0 +1,140 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from .models import Job
+
+JOB_DIR = os.getenv("FINOPS_JOB_DIR", ".jobs")
+JOB_WORKERS = int(os.getenv("FINOPS_JOB_WORKERS", "4"))
+JOB_TTL_SECONDS = int(os.getenv("FINOPS_JOB_TTL_SECONDS", str(24 * 3600)))
+
+
+class JobManager:
+    """
+    Runs pricing and discovery work on a shared background thread pool.
+
+    Every job is persisted as a JSON file in `job_dir`, so any session
+    (including one that reconnects after a rerun or a closed tab) can read
+    its progress and result by ID.
+    """
+
+    def __init__(self, job_dir: str = JOB_DIR, max_workers: int = JOB_WORKERS):
+        self.job_dir = job_dir
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="finops-job"
+        )
+        self._lock = threading.Lock()
+        os.makedirs(job_dir, exist_ok=True)
+        self._recover()
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args, **kwargs) -> str:
+        """
+        Queues fn(*args, progress=..., **kwargs) and returns the job ID.
+        fn must accept a `progress(fraction, message)` keyword argument.
+        """
+        # Finished jobs hold full results, so expire them while running too
+        self._prune()
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            created_at=time.time(),
+            owner_host=socket.gethostname(),
+            owner_pid=os.getpid(),
+        )
+        self._save(job)
+        self.executor.submit(self._run, job.id, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        try:
+            with open(self._path(job_id)) as f:
+                return Job(**json.load(f))
+        except FileNotFoundError:
+            # Never existed, or expired by this or another server process
+            return None
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args, kwargs: Dict) -> None:
+        self._update(job_id, status="running")
+
+        def progress(fraction: float, message: str = "") -> None:
+            self._update(job_id, progress=min(max(fraction, 0.0), 1.0), message=message)
+
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+            self._update(job_id, status="done", progress=1.0, result=result)
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e))
+
+    def _update(self, job_id: str, **changes) -> None:
+        with self._lock:
+            job = self.get(job_id)
+            if job is None:
+                return
+            data = job.dict()
+            data.update(changes)
+            self._save(Job(**data))
+
+    def _save(self, job: Job) -> None:
+        # Write then rename so readers never see a half-written file
+        path = self._path(job.id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job.dict(), f, default=str)
+        os.replace(tmp_path, path)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{os.path.basename(job_id)}.json")
+
+    def _prune(self) -> None:
+        # The last write of a job is its end, or its latest progress update
+        cutoff = time.time() - JOB_TTL_SECONDS
+        for name in os.listdir(self.job_dir):
+            path = os.path.join(self.job_dir, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _owner_alive(job: Job) -> bool:
+        if job.owner_host != socket.gethostname():
+            # Another host sharing the directory, its jobs are not ours to fail
+            return job.owner_host is not None
+        try:
+            os.kill(job.owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return job.owner_pid != os.getpid()
+
+    def _recover(self) -> None:
+        # Jobs left queued/running by a server process that is gone will
+        # never finish; those of live processes sharing the directory will
+        self._prune()
+        for name in os.listdir(self.job_dir):
+            if not name.endswith(".json"):
+                continue
+            job = self.get(name[: -len(".json")])
+            if job is None or job.status not in ("queued", "running"):
+                continue
+            if not self._owner_alive(job):
+                self._update(job.id, status="failed", error="Interrupted by server restart")
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Returns the process-wide JobManager shared by every session."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Literal
+from typing import Any, Dict, List, Literal, Optional
 
 class Entry(BaseModel):
     engine: Literal["PostgreSQL", "MariaDB"]
@@ -17,4 +17,26 @@ class EC2ExtendedEntry(BaseModel):
     instance_type: str
     vcpus: int
     memory_gb: float
-    region: str
\ No newline at end of file
+    region: str
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "done", "failed"] = "queued"
+    progress: float = 0.0
+    message: str = ""
+    created_at: float
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    owner_host: Optional[str] = None
+    owner_pid: Optional[int] = None
+
+class PlanStep(BaseModel):
+    service: Literal["EC2", "RDS"]
+    region_code: str
+    strategy: Literal["targeted", "sharded_sweep", "sweep"]
+    inventory_rows: int
+    expected_calls: int
+    actual_calls: int = 0
+    error: Optional[str] = None
+    queries: List[Dict[str, Any]] = []
@@ -0,0 +1,359 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .decode import decode_pages, extract_ec2_records, extract_rds_records
+from .helpers import REGION_MAP
+from .models import Entry, PlanStep
+
+# Cost model, in pricing API calls (one call per page of up to 100 products).
+# A full Linux/shared EC2 sweep is ~10 pages per region, sharding it by vCPU
+# count splits it into roughly 5 comparable buckets, and one RDS engine is
+# ~5 pages per region including reservation terms.
+EC2_SWEEP_PAGES = int(os.getenv("FINOPS_EC2_SWEEP_PAGES", "10"))
+EC2_VCPU_SHARDS = int(os.getenv("FINOPS_EC2_VCPU_SHARDS", "5"))
+RDS_SWEEP_PAGES = int(os.getenv("FINOPS_RDS_SWEEP_PAGES", "5"))
+PLANNER_WORKERS = int(os.getenv("FINOPS_PLANNER_WORKERS", "4"))
+
+# Strategies are listed cheapest-to-decode first, so ties prefer them
+STRATEGIES = ["targeted", "sharded_sweep", "sweep"]
+
+ProgressCallback = Callable[[float, str], None]
+
+
+def _term(field: str, value: str) -> Dict[str, str]:
+    return {"Type": "TERM_MATCH", "Field": field, "Value": value}
+
+
+def ec2_base_filters(region_code: str) -> List[Dict[str, str]]:
+    return [
+        _term("regionCode", region_code),
+        _term("operatingSystem", "Linux"),
+        _term("preInstalledSw", "NA"),
+        _term("tenancy", "Shared"),
+        _term("capacitystatus", "Used"),
+    ]
+
+
+def ec2_memory_value(memory_gb: float) -> str:
+    # PriceList spells memory like "8 GiB", "0.5 GiB" or "1,024 GiB"
+    return f"{memory_gb:,g} GiB"
+
+
+def rds_deployment(entry: Entry) -> str:
+    return "Multi-AZ" if entry.multi_az.lower() == "oui" else "Single-AZ"
+
+
+def rds_filters(entry: Entry) -> List[Dict[str, str]]:
+    region_code = REGION_MAP.get(entry.region, entry.region)
+    return [
+        _term("instanceType", entry.instance_type),
+        _term("regionCode", region_code),
+        _term("databaseEngine", entry.engine.lower()),
+        _term("deploymentOption", rds_deployment(entry)),
+        _term("productFamily", "Database Instance"),
+    ]
+
+
+def rds_rate_key(entry: Entry) -> Tuple[str, str, str, str]:
+    # Case-insensitive like the pricing API, so every plan keys rates alike
+    return (
+        entry.instance_type.lower(),
+        REGION_MAP.get(entry.region, entry.region),
+        entry.engine.lower(),
+        rds_deployment(entry).lower(),
+    )
+
+
+def _cheapest(candidates: Dict[str, Tuple[int, List[Dict[str, Any]]]]) -> Tuple[str, int, List[Dict[str, Any]]]:
+    strategy = min(candidates, key=lambda s: (candidates[s][0], STRATEGIES.index(s)))
+    expected_calls, queries = candidates[strategy]
+    return strategy, expected_calls, queries
+
+
+def plan_ec2(rows: List[Dict[str, Any]]) -> List[PlanStep]:
+    """
+    Picks, per region, the cheapest way to price an EC2 inventory:
+    targeted lookups (one per instance type and one per vCPU/memory shape),
+    a sweep sharded by vCPU count, or a full regional sweep.
+    """
+    by_region: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_region.setdefault(REGION_MAP.get(row["region"], row["region"]), []).append(row)
+
+    steps = []
+    for region_code, region_rows in by_region.items():
+        base = ec2_base_filters(region_code)
+        types = sorted({row["instance_type"] for row in region_rows})
+        shapes = sorted({(int(row["vcpus"]), float(row["memory_gb"])) for row in region_rows})
+        vcpu_values = sorted({vcpus for vcpus, _ in shapes})
+
+        # Every query lists the inventory types and shapes it prices, so a
+        # failed query can be blamed on exactly the rows it covers
+        targeted = [{"filters": base + [_term("instanceType", t)], "instance_types": [t]} for t in types] + [
+            {
+                "filters": base + [_term("vcpu", str(v)), _term("memory", ec2_memory_value(m))],
+                "shapes": [[v, m]],
+            }
+            for v, m in shapes
+        ]
+        sharded = [
+            {
+                "filters": base + [_term("vcpu", str(v))],
+                "instance_types": sorted({row["instance_type"] for row in region_rows if int(row["vcpus"]) == v}),
+                "shapes": [[sv, sm] for sv, sm in shapes if sv == v],
+            }
+            for v in vcpu_values
+        ]
+        shard_pages = math.ceil(EC2_SWEEP_PAGES / EC2_VCPU_SHARDS)
+
+        strategy, expected_calls, queries = _cheapest(
+            {
+                "targeted": (len(targeted), targeted),
+                "sharded_sweep": (len(sharded) * shard_pages, sharded),
+                "sweep": (
+                    EC2_SWEEP_PAGES,
+                    [{"filters": base, "instance_types": types, "shapes": [[v, m] for v, m in shapes]}],
+                ),
+            }
+        )
+        steps.append(
+            PlanStep(
+                service="EC2",
+                region_code=region_code,
+                strategy=strategy,
+                inventory_rows=len(region_rows),
+                expected_calls=expected_calls,
+                queries=queries,
+            )
+        )
+    return steps
+
+
+def plan_rds(entries: List[Entry]) -> List[PlanStep]:
+    """
+    Picks, per region, between one MaxResults=1 lookup per distinct
+    (type, engine, deployment) and a paginated sweep per engine.
+    """
+    by_region: Dict[str, Dict[tuple, Entry]] = {}
+    counts: Dict[str, int] = {}
+    for entry in entries:
+        key = rds_rate_key(entry)
+        by_region.setdefault(key[1], {}).setdefault(key, entry)
+        counts[key[1]] = counts.get(key[1], 0) + 1
+
+    steps = []
+    for region_code, distinct in by_region.items():
+        targeted = [
+            {"filters": rds_filters(entry), "rate_key": list(key)}
+            for key, entry in distinct.items()
+        ]
+        engines = sorted({key[2] for key in distinct})
+        sweep = [
+            {
+                "filters": [
+                    _term("regionCode", region_code),
+                    _term("databaseEngine", engine),
+                    _term("productFamily", "Database Instance"),
+                ],
+                "rate_keys": [list(key) for key in distinct if key[2] == engine],
+            }
+            for engine in engines
+        ]
+        strategy, expected_calls, queries = _cheapest(
+            {
+                "targeted": (len(targeted), targeted),
+                "sweep": (len(sweep) * RDS_SWEEP_PAGES, sweep),
+            }
+        )
+        steps.append(
+            PlanStep(
+                service="RDS",
+                region_code=region_code,
+                strategy=strategy,
+                inventory_rows=counts[region_code],
+                expected_calls=expected_calls,
+                queries=queries,
+            )
+        )
+    return steps
+
+
+def _run_query(pricing, service_code: str, query: Dict[str, Any], single_item: bool, extract) -> Tuple[List[Dict[str, Any]], int]:
+    if single_item:
+        response = pricing.get_products(
+            ServiceCode=service_code,
+            Filters=query["filters"],
+            FormatVersion="aws_v1",
+            MaxResults=1,
+        )
+        # A single item is cheaper to decode here than to ship to the pool
+        return extract(response["PriceList"][:1]), 1
+
+    calls = 0
+
+    def counted(pages):
+        nonlocal calls
+        for page in pages:
+            calls += 1
+            yield page
+
+    pages = pricing.get_paginator("get_products").paginate(
+        ServiceCode=service_code, Filters=query["filters"], FormatVersion="aws_v1"
+    )
+    return list(decode_pages(counted(pages), extract)), calls
+
+
+def _execute(
+    steps: List[PlanStep],
+    pricing,
+    service_code: str,
+    extract,
+    single_item: Callable[[PlanStep], bool],
+    progress: Optional[ProgressCallback],
+) -> List[List[List[Dict[str, Any]]]]:
+    """
+    Runs every query of every step on a small thread pool, so shards and
+    regions are fetched concurrently. Returns the records per step, per query.
+    """
+    lock = threading.Lock()
+    tasks = [(i, j) for i, step in enumerate(steps) for j in range(len(step.queries))]
+    results: List[List[Any]] = [[[] for _ in step.queries] for step in steps]
+    done = 0
+
+    def run(i: int, j: int) -> None:
+        nonlocal done
+        step = steps[i]
+        try:
+            records, calls = _run_query(pricing, service_code, step.queries[j], single_item(step), extract)
+            results[i][j] = records
+        except Exception as e:
+            calls = 1
+            with lock:
+                step.error = step.queries[j]["error"] = str(e)
+        with lock:
+            step.actual_calls += calls
+            done += 1
+            if progress:
+                progress(done / len(tasks), f"Fetched {step.service} prices for {step.region_code} ({step.strategy})")
+
+    with ThreadPoolExecutor(max_workers=PLANNER_WORKERS) as executor:
+        for future in [executor.submit(run, i, j) for i, j in tasks]:
+            future.result()
+    return results
+
+
+def execute_ec2_plan(
+    steps: List[PlanStep], pricing, progress: Optional[ProgressCallback] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Runs an EC2 plan and returns the priced catalogue records per region.
+    Instance types a sharded sweep missed get a targeted lookup. Failed
+    queries keep their error, see ec2_row_error.
+    """
+    results = _execute(steps, pricing, "AmazonEC2", extract_ec2_records, lambda step: False, progress)
+
+    catalogs = {}
+    for step, per_query in zip(steps, results):
+        seen = set()
+        records = []
+        for query_records in per_query:
+            for record in query_records:
+                if record["od_hourly"] is not None and record["instance_type"] not in seen:
+                    seen.add(record["instance_type"])
+                    records.append(record)
+
+        if step.strategy == "sharded_sweep":
+            # An inventory row with a wrong vCPU count lands in the wrong
+            # shard; rows of failed shards already carry the shard's error
+            wanted = sorted(
+                {t for query in step.queries if "error" not in query for t in query["instance_types"]}
+            )
+            for instance_type in wanted:
+                if instance_type in seen:
+                    continue
+                query = {
+                    "filters": ec2_base_filters(step.region_code) + [_term("instanceType", instance_type)],
+                    "instance_types": [instance_type],
+                }
+                try:
+                    extra, calls = _run_query(pricing, "AmazonEC2", query, False, extract_ec2_records)
+                except Exception as e:
+                    step.error = query["error"] = str(e)
+                    calls, extra = 1, []
+                step.queries.append(query)
+                step.actual_calls += calls
+                records.extend(r for r in extra if r["od_hourly"] is not None)
+        catalogs[step.region_code] = records
+    return catalogs
+
+
+def _errors(queries: List[Dict[str, Any]]) -> Optional[str]:
+    errors = sorted({query["error"] for query in queries})
+    return "; ".join(errors) if errors else None
+
+
+def ec2_row_error(step: PlanStep, instance_type: str, vcpus: int, memory_gb: float) -> Optional[str]:
+    """
+    The errors of the failed queries of an executed EC2 step that cover an
+    inventory row's instance type or its vCPU/memory shape, if any. Such a
+    row would otherwise be compared against a partial catalogue.
+    """
+    shape = (int(vcpus), float(memory_gb))
+    return _errors(
+        [
+            query
+            for query in step.queries
+            if "error" in query
+            and (
+                instance_type in query.get("instance_types", [])
+                or shape in {(int(v), float(m)) for v, m in query.get("shapes", [])}
+            )
+        ]
+    )
+
+
+def rds_key_error(step: PlanStep, key: Tuple[str, str, str, str]) -> Optional[str]:
+    """The errors of the failed queries of an executed RDS step covering a rds_rate_key."""
+    return _errors(
+        [
+            query
+            for query in step.queries
+            if "error" in query
+            and (query.get("rate_key") == list(key) or list(key) in query.get("rate_keys", []))
+        ]
+    )
+
+
+def execute_rds_plan(
+    steps: List[PlanStep], pricing, progress: Optional[ProgressCallback] = None
+) -> Dict[tuple, Dict[str, Any]]:
+    """Runs an RDS plan and returns the rate records keyed by rds_rate_key."""
+    results = _execute(
+        steps, pricing, "AmazonRDS", extract_rds_records, lambda step: step.strategy == "targeted", progress
+    )
+
+    rates: Dict[tuple, Dict[str, Any]] = {}
+    for step, per_query in zip(steps, results):
+        for query, query_records in zip(step.queries, per_query):
+            for record in query_records:
+                if record["od_hourly"] is None:
+                    continue
+                if "rate_key" in query:
+                    key = tuple(query["rate_key"])
+                else:
+                    key = (
+                        (record["instance_type"] or "").lower(),
+                        record["region_code"],
+                        (record["database_engine"] or "").lower(),
+                        (record["deployment_option"] or "").lower(),
+                    )
+                rates.setdefault(key, record)
+    return rates
+
+
+def plan_report(steps: List[PlanStep]) -> List[Dict[str, Any]]:
+    """The chosen plan with expected and actual call counts, for display."""
+    return [step.dict(exclude={"queries"}) for step in steps]
+
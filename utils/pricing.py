@@ -1,140 +1,166 @@
-import json
 import boto3
 import re
-from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
 from .models import Entry, EC2Entry
-from .helpers import format_currency, format_percent, get_reserved_price, REGION_MAP
+from .helpers import (
+    format_currency,
+    format_percent,
+    option_key,
+    HOURS_PER_MONTH,
+    REGION_MAP,
+    RESERVATION_OPTIONS,
+)
+from .projection import project_costs
+from .planner import (
+    ec2_row_error,
+    execute_ec2_plan,
+    execute_rds_plan,
+    plan_ec2,
+    plan_rds,
+    plan_report as report_plan,
+    rds_key_error,
+    rds_rate_key,
+)
 
-def fetch_rds_price(entry: Entry) -> Dict[str, Any]:
+def _rate_fields(record: Dict[str, Any]) -> Dict[str, float]:
+    return {k: v for k, v in record.items() if k.endswith(("_hourly", "_upfront"))}
+
+
+def _format_optional(value: float, formatter) -> str:
+    return "N/A" if np.isnan(value) else formatter(value)
+
+
+def fetch_rds_prices(
+    entries: List[Entry],
+    progress: Optional[Callable[[float, str], None]] = None,
+    plan_report: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Prices a whole RDS inventory. Rates come from the query planner, once
+    per distinct (instance type, region, engine, deployment), and the period
+    projection runs vectorized over every entry. The chosen plan is appended
+    to plan_report when given.
+    """
     try:
-        region_code = REGION_MAP.get(entry.region, entry.region)
         pricing = boto3.client("pricing", region_name="us-east-1")
+    except Exception as e:
+        return [{"error": str(e), **entry.dict()} for entry in entries]
 
-        filters = [
-            {
-                "Type": "TERM_MATCH",
-                "Field": "instanceType",
-                "Value": entry.instance_type,
-            },
-            {"Type": "TERM_MATCH", "Field": "regionCode", "Value": region_code},
-            {
-                "Type": "TERM_MATCH",
-                "Field": "databaseEngine",
-                "Value": entry.engine.lower(),
-            },
-            {
-                "Type": "TERM_MATCH",
-                "Field": "deploymentOption",
-                "Value": "Multi-AZ" if entry.multi_az.lower() == "oui" else "Single-AZ",
-            },
-            {
-                "Type": "TERM_MATCH",
-                "Field": "productFamily",
-                "Value": "Database Instance",
-            },
-        ]
-
-        response = pricing.get_products(
-            ServiceCode="AmazonRDS",
-            Filters=filters,
-            FormatVersion="aws_v1",
-            MaxResults=1,
-        )
+    steps = plan_rds(entries)
+    records = execute_rds_plan(steps, pricing, progress)
+    if plan_report is not None:
+        plan_report.extend(report_plan(steps))
 
-        if not response["PriceList"]:
-            raise ValueError("No pricing data found")
+    steps_by_region = {step.region_code: step for step in steps}
+    keys = [rds_rate_key(entry) for entry in entries]
+    rates = {key: _rate_fields(record) for key, record in records.items()}
+    errors = {
+        key: rds_key_error(steps_by_region[key[1]], key) or "No pricing data found"
+        for key in keys
+        if key not in rates
+    }
 
-        price_item = json.loads(response["PriceList"][0])
-        on_demand = list(price_item["terms"]["OnDemand"].values())[0]
-        od_price = float(
-            list(on_demand["priceDimensions"].values())[0]["pricePerUnit"]["USD"]
-        )
-        od_annual = round(od_price * 24 * 365, 2)
-
-        reserved_terms = price_item.get("terms", {}).get("Reserved", {})
-        no_upfront = get_reserved_price(reserved_terms, "No Upfront")
-        partial_upfront = get_reserved_price(reserved_terms, "Partial Upfront")
-        all_upfront = get_reserved_price(reserved_terms, "All Upfront")
-
-        def calc_savings(base: float, discounted: float) -> Dict[str, str]:
-            return {
-                "economy_usd": format_currency(base - discounted),
-                "economy_percent": format_percent(100 * (base - discounted) / base)
-                if base
-                else "N/A",
-            }
+    priced = [(entry, key) for entry, key in zip(entries, keys) if key in rates]
+    projected = None
+    if priced:
+        frame = pd.DataFrame([rates[key] for _, key in priced])
+        frame["start"] = [entry.start for entry, _ in priced]
+        frame["end"] = [entry.end for entry, _ in priced]
+        projected = project_costs(frame).to_dict(orient="records")
 
+    def calc_savings(base: float, discounted: float) -> Dict[str, str]:
         return {
+            "economy_usd": format_currency(base - discounted),
+            "economy_percent": format_percent(100 * (base - discounted) / base)
+            if base
+            else "N/A",
+        }
+
+    results = []
+    position = 0
+    for entry, key in zip(entries, keys):
+        if key in errors:
+            results.append({"error": errors[key], **entry.dict()})
+            continue
+
+        row = projected[position]
+        position += 1
+        od_annual = round(row["on_demand_annual"], 2)
+        result = {
             "instance_type": entry.instance_type,
             "engine": entry.engine,
             "region": entry.region,
             "multi_az": entry.multi_az,
             "start": entry.start,
             "end": entry.end,
+            "billed_hours": _format_optional(row["billed_hours"], lambda v: f"{v:,.0f}"),
             "on_demand_annual_usd": format_currency(od_annual),
-            "no_upfront_reserved_annual_usd": format_currency(no_upfront),
-            **calc_savings(od_annual, no_upfront),
-            "partial_upfront_reserved_annual_usd": format_currency(partial_upfront),
-            **{
-                f"partial_upfront_{k}": v
-                for k, v in calc_savings(od_annual, partial_upfront).items()
-            },
-            "all_upfront_reserved_annual_usd": format_currency(all_upfront),
-            **{
-                f"all_upfront_{k}": v
-                for k, v in calc_savings(od_annual, all_upfront).items()
-            },
+            "on_demand_period_usd": _format_optional(
+                row["on_demand_period"], format_currency
+            ),
         }
+        for term_type in RESERVATION_OPTIONS:
+            opt = option_key(term_type)
+            # No Upfront keeps the historical unprefixed economy columns
+            prefix = "" if term_type == "No Upfront" else f"{opt}_"
+            annual = round(row[f"{opt}_annual"], 2)
+            result[f"{opt}_reserved_annual_usd"] = format_currency(annual)
+            result.update(
+                {f"{prefix}{k}": v for k, v in calc_savings(od_annual, annual).items()}
+            )
+            result[f"{opt}_reserved_period_usd"] = _format_optional(
+                row[f"{opt}_period"], format_currency
+            )
+            result[f"{opt}_period_economy_usd"] = _format_optional(
+                row[f"{opt}_period_savings"], format_currency
+            )
+            result[f"{opt}_break_even_month"] = _format_optional(
+                row[f"{opt}_break_even_month"], lambda v: f"{v:.0f}"
+            )
+        results.append(result)
 
-    except Exception as e:
-        return {"error": str(e), **entry.dict()}
+    return results
+
+
+def fetch_rds_price(entry: Entry) -> Dict[str, Any]:
+    return fetch_rds_prices([entry])[0]
 
 
 def fetch_ec2_comparison(
-    instance_type: str, vcpus: int, memory_gb: float, region: str
+    instance_type: str,
+    vcpus: int,
+    memory_gb: float,
+    region: str,
+    catalog: Optional[List[Dict[str, Any]]] = None,
 ) -> List[Dict[str, Any]]:
     """
     Returns up to 5 Graviton candidates with exact vCPU and memory,
     sorted by lowest monthly price. Output is long-format ready.
+
+    catalog is the region's priced records from execute_ec2_plan; without
+    it a single-row plan is run.
     """
     try:
-        pricing = boto3.client("pricing", region_name="us-east-1")
         region_code = REGION_MAP.get(region, region)
-
-        def get_monthly_price(product: Dict) -> float:
-            od_terms = product["terms"]["OnDemand"]
-            od_term = list(od_terms.values())[0]
-            price_dim = list(od_term["priceDimensions"].values())[0]
-            price_hourly = float(price_dim["pricePerUnit"]["USD"])
-            return price_hourly * 24 * 30  # Approximate monthly
-
-        # Fetch all EC2 Linux shared instances for the region
-        paginator = pricing.get_paginator("get_products")
-        filters = [
-            {"Type": "TERM_MATCH", "Field": "regionCode", "Value": region_code},
-            {"Type": "TERM_MATCH", "Field": "operatingSystem", "Value": "Linux"},
-            {"Type": "TERM_MATCH", "Field": "preInstalledSw", "Value": "NA"},
-            {"Type": "TERM_MATCH", "Field": "tenancy", "Value": "Shared"},
-            {"Type": "TERM_MATCH", "Field": "capacitystatus", "Value": "Used"},
-        ]
-
-        all_instances = []
-        for page in paginator.paginate(
-            ServiceCode="AmazonEC2", Filters=filters, FormatVersion="aws_v1"
-        ):
-            for item_str in page["PriceList"]:
-                product = json.loads(item_str)
-                attr = product["product"]["attributes"]
-                if all(k in attr for k in ["vcpu", "memory", "instanceType"]):
-                    all_instances.append(product)
+        if catalog is None:
+            pricing = boto3.client("pricing", region_name="us-east-1")
+            row = {"instance_type": instance_type, "vcpus": vcpus, "memory_gb": memory_gb, "region": region}
+            steps = plan_ec2([row])
+            catalog = execute_ec2_plan(steps, pricing)[region_code]
+            error = ec2_row_error(steps[0], instance_type, vcpus, memory_gb)
+            if error:
+                raise RuntimeError(error)
+        all_instances = catalog
 
         # Get pricing for original instance
         original_instance = next(
             (
                 inst
                 for inst in all_instances
-                if inst["product"]["attributes"]["instanceType"] == instance_type
-                and inst["product"]["attributes"]["regionCode"] == region_code
+                if inst["instance_type"] == instance_type
+                and inst["region_code"] == region_code
             ),
             None,
         )
@@ -148,24 +174,22 @@ def fetch_ec2_comparison(
                 }
             ]
 
-        original_monthly = get_monthly_price(original_instance)
+        original_monthly = original_instance["od_hourly"] * HOURS_PER_MONTH
 
         # Look for Graviton matches with exact vCPU and memory
         graviton_matches = []
         for inst in all_instances:
-            attr = inst["product"]["attributes"]
-            inst_type = attr.get("instanceType", "")
+            inst_type = inst["instance_type"]
             if not re.search(r"\dg\.", inst_type):  # Graviton pattern
                 continue
 
-            try:
-                cand_vcpus = int(attr["vcpu"])
-                cand_memory = float(attr["memory"].replace(" GiB", ""))
-            except Exception:
+            cand_vcpus = inst["vcpus"]
+            cand_memory = inst["memory_gb"]
+            if cand_vcpus is None or cand_memory is None:
                 continue
 
             if cand_vcpus == vcpus and abs(cand_memory - memory_gb) < 0.01:
-                monthly_price = get_monthly_price(inst)
+                monthly_price = inst["od_hourly"] * HOURS_PER_MONTH
                 graviton_matches.append(
                     {
                         "candidate_type": inst_type,
@@ -221,3 +245,65 @@ def fetch_ec2_comparison(
                 "error": str(e),
             }
         ]
+
+
+def fetch_ec2_comparisons(
+    rows: List[Dict[str, Any]],
+    progress: Optional[Callable[[float, str], None]] = None,
+    plan_report: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs fetch_ec2_comparison for every inventory row (instance_type,
+    vcpus, memory_gb, region) against one planned fetch of the catalogue
+    and flattens the candidates. The chosen plan is appended to plan_report
+    when given.
+    """
+    try:
+        pricing = boto3.client("pricing", region_name="us-east-1")
+    except Exception as e:
+        return [{"input_type": row["instance_type"], "region": row["region"], "error": str(e)} for row in rows]
+
+    steps = plan_ec2(rows)
+    catalogs = execute_ec2_plan(steps, pricing, progress)
+    if plan_report is not None:
+        plan_report.extend(report_plan(steps))
+    steps_by_region = {step.region_code: step for step in steps}
+
+    results = []
+    for row in rows:
+        region_code = REGION_MAP.get(row["region"], row["region"])
+        # A failed type or shape query would leave a partial catalogue
+        error = ec2_row_error(steps_by_region[region_code], row["instance_type"], row["vcpus"], row["memory_gb"])
+        if error:
+            results.append({"input_type": row["instance_type"], "region": row["region"], "error": error})
+            continue
+        results.extend(
+            fetch_ec2_comparison(
+                row["instance_type"],
+                int(row["vcpus"]),
+                float(row["memory_gb"]),
+                row["region"],
+                catalogs[region_code],
+            )
+        )
+    return results
+
+
+def run_ec2_job(
+    rows: List[Dict[str, Any]],
+    progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, Any]:
+    """Background job entry point: Graviton comparisons plus the query plan."""
+    plan: List[Dict[str, Any]] = []
+    results = fetch_ec2_comparisons(rows, progress, plan)
+    return {"results": results, "plan": plan}
+
+
+def run_rds_job(
+    entries: List[Entry],
+    progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, Any]:
+    """Background job entry point: RDS prices plus the query plan."""
+    plan: List[Dict[str, Any]] = []
+    results = fetch_rds_prices(entries, progress, plan)
+    return {"results": results, "plan": plan}
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from .helpers import HOURS_PER_YEAR, HOURS_PER_MONTH, RESERVATION_OPTIONS, option_key
+
+DATE_FORMAT = "%m/%d/%Y"
+
+
+def parse_period(start: pd.Series, end: pd.Series) -> pd.DataFrame:
+    """
+    Parses MM/DD/YYYY start/end columns into billed hours. The end date is
+    inclusive; unparseable or reversed periods come back as NaN.
+    """
+    starts = pd.to_datetime(start, format=DATE_FORMAT, errors="coerce")
+    ends = pd.to_datetime(end, format=DATE_FORMAT, errors="coerce")
+    ends_exclusive = ends + pd.Timedelta(days=1)
+
+    hours = (ends_exclusive - starts).dt.total_seconds().to_numpy(dtype=float) / 3600
+    hours[~(hours > 0)] = np.nan
+    return pd.DataFrame({"billed_hours": hours}, index=start.index)
+
+
+def project_costs(rates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Projects on-demand and 1yr reservation costs over each row's period.
+
+    `rates` needs `start`, `end`, `od_hourly` and, for every reservation
+    option, `<option>_upfront` and `<option>_hourly` columns. All maths is
+    done column-wise so it scales to large inventories.
+    """
+    period = parse_period(rates["start"], rates["end"])
+    hours = period["billed_hours"].to_numpy()
+    # Whole 1yr terms that fit in the period, and the hours left after them
+    full_terms = np.floor(hours / HOURS_PER_YEAR)
+    remaining_hours = hours - full_terms * HOURS_PER_YEAR
+    od_hourly = rates["od_hourly"].to_numpy(dtype=float)
+
+    projected = {
+        "billed_hours": hours,
+        "on_demand_annual": od_hourly * HOURS_PER_YEAR,
+        "on_demand_period": od_hourly * hours,
+    }
+    od_monthly = od_hourly * HOURS_PER_MONTH
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for term_type in RESERVATION_OPTIONS:
+            key = option_key(term_type)
+            upfront = rates[f"{key}_upfront"].to_numpy(dtype=float)
+            hourly = rates[f"{key}_hourly"].to_numpy(dtype=float)
+            annual = upfront + hourly * HOURS_PER_YEAR
+            offered = annual > 0
+
+            # Reservations bill the whole term, used or not: the remaining
+            # hours run on demand unless one more term is cheaper
+            period_cost = annual * full_terms + np.minimum(od_hourly * remaining_hours, annual)
+            period_cost = np.where(offered, period_cost, np.nan)
+            break_even = np.ceil(annual / od_monthly)
+            break_even = np.where(
+                offered & (break_even <= 12), break_even, np.nan
+            )
+
+            projected[f"{key}_annual"] = annual
+            projected[f"{key}_period"] = period_cost
+            projected[f"{key}_period_savings"] = projected["on_demand_period"] - period_cost
+            projected[f"{key}_break_even_month"] = break_even
+
+    return pd.DataFrame(projected, index=rates.index)
@@ -0,0 +1,199 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from .cur import weight_ec2_results
+
+RESULT_SPILL_DIR = os.getenv("FINOPS_RESULT_SPILL_DIR")
+RESULT_MEMORY_MB = int(os.getenv("FINOPS_RESULT_MEMORY_MB", "512"))
+RESULT_TTL_SECONDS = int(os.getenv("FINOPS_RESULT_TTL_SECONDS", str(24 * 3600)))
+
+
+class ResultStore:
+    """
+    Keeps computed results once, as immutable Arrow tables keyed by the
+    SHA-256 of their content. Sessions only hold the returned handle, so
+    identical results from many users share one copy.
+
+    Beyond `max_memory_bytes` the least recently used tables are dropped,
+    or with a spill directory written to Arrow IPC files and replaced by
+    memory-mapped tables. Tables unused for `ttl_seconds` are dropped along
+    with their spill files.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Optional[str] = RESULT_SPILL_DIR,
+        max_memory_mb: int = RESULT_MEMORY_MB,
+        ttl_seconds: int = RESULT_TTL_SECONDS,
+    ):
+        self.spill_dir = spill_dir
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds
+        self._tables: "OrderedDict[str, pa.Table]" = OrderedDict()
+        self._in_memory: "OrderedDict[str, int]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def put(self, df: pd.DataFrame) -> str:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        payload = sink.getvalue()
+        handle = hashlib.sha256(payload).hexdigest()
+
+        with self._lock:
+            self._evict_expired()
+            if handle in self._tables:
+                self._touch(handle)
+                return handle
+            self._tables[handle] = table
+            self._in_memory[handle] = table.nbytes
+            self._touch(handle)
+            self._enforce_memory_limit()
+        return handle
+
+    def get(self, handle: Optional[str]) -> Optional[pa.Table]:
+        if not handle:
+            return None
+        with self._lock:
+            self._evict_expired()
+            table = self._tables.get(handle)
+            if table is not None:
+                self._touch(handle)
+                return table
+        # Spilled by another server process sharing the directory
+        path = self._spill_path(handle)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all() if path else None
+        except FileNotFoundError:
+            table = None
+        if table is None:
+            return None
+        with self._lock:
+            self._tables[handle] = table
+            self._touch(handle)
+        return table
+
+    def _touch(self, handle: str) -> None:
+        self._last_used[handle] = time.time()
+        self._tables.move_to_end(handle)
+        if handle in self._in_memory:
+            self._in_memory.move_to_end(handle)
+        path = self._spill_path(handle)
+        if path and handle not in self._in_memory:
+            # Spill files are expired by mtime, also by other processes
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    def _drop(self, handle: str) -> None:
+        self._tables.pop(handle, None)
+        self._in_memory.pop(handle, None)
+        self._last_used.pop(handle, None)
+        path = self._spill_path(handle)
+        if path:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for handle in [h for h, used in self._last_used.items() if used < cutoff]:
+            self._drop(handle)
+        if not self.spill_dir:
+            return
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            try:
+                if name.endswith(".arrow") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _enforce_memory_limit(self) -> None:
+        # _in_memory is kept in least recently used first order
+        while sum(self._in_memory.values()) > self.max_memory_bytes and len(self._in_memory) > 1:
+            handle = next(iter(self._in_memory))
+            if not self.spill_dir:
+                # Sessions still holding the handle are asked to rerun
+                self._drop(handle)
+                continue
+            del self._in_memory[handle]
+            path = self._spill_path(handle)
+            if not os.path.exists(path):
+                tmp_path = f"{path}.tmp"
+                with pa.OSFile(tmp_path, "wb") as sink:
+                    with pa.ipc.new_file(sink, self._tables[handle].schema) as writer:
+                        writer.write_table(self._tables[handle])
+                os.replace(tmp_path, path)
+            # Reads now come straight from the page cache, not the heap
+            self._tables[handle] = pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+    def _spill_path(self, handle: str) -> Optional[str]:
+        if not self.spill_dir:
+            return None
+        return os.path.join(self.spill_dir, f"{os.path.basename(handle)}.arrow")
+
+
+def cheapest_per_group(table: pa.Table) -> pa.Table:
+    """
+    Returns the cheapest candidate row per (input_type, region). Only the
+    key columns are materialized; the selected rows are taken from the
+    stored table.
+    """
+    if "candidate_monthly" not in table.column_names:
+        return table.slice(0, 0)
+    keys = table.select(["input_type", "region", "candidate_monthly"]).to_pandas()
+    keys["candidate_monthly_raw"] = pd.to_numeric(
+        keys["candidate_monthly"].replace(r"[\$,]", "", regex=True), errors="coerce"
+    )
+    keys = keys.dropna(subset=["input_type", "region", "candidate_monthly_raw"])
+    if keys.empty:
+        return table.slice(0, 0)
+    indices = keys.groupby(["input_type", "region"])["candidate_monthly_raw"].idxmin()
+    return table.take(pa.array(indices.to_numpy()))
+
+
+def weight_ec2_table(table: pa.Table, usage: Optional[pd.DataFrame]) -> pa.Table:
+    """
+    Appends the CUR usage columns of weight_ec2_results to a stored (or
+    filtered) table. Only the join and savings columns are materialized.
+    """
+    key_columns = ["input_type", "region", "savings_usd"]
+    if usage is None or usage.empty or not set(key_columns) <= set(table.column_names):
+        return table
+    weighted = weight_ec2_results(table.select(key_columns).to_pandas(), usage)
+    for column in ["usage_hours", "utilization", "weighted_savings_usd"]:
+        table = table.append_column(column, pa.array(weighted[column].tolist(), type=pa.string()))
+    return table
+
+
+def table_to_csv(table: pa.Table) -> bytes:
+    buffer = io.BytesIO()
+    pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(quoting_style="needed"))
+    return buffer.getvalue()
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Returns the process-wide ResultStore shared by every session."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore()
+        return _store
@@ -0,0 +1,232 @@
+import math
+import os
+import threading
+import boto3
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .helpers import HOURS_PER_MONTH, REGION_MAP, format_currency
+from .pricing import fetch_ec2_comparisons
+
+SPOT_HISTORY_DAYS = int(os.getenv("FINOPS_SPOT_HISTORY_DAYS", "30"))
+SPOT_WORKERS = int(os.getenv("FINOPS_SPOT_WORKERS", "8"))
+SPOT_PRODUCT = "Linux/UNIX"
+
+# Prices are binned on a log scale (0.5% wide bins), so p90 is exact to
+# within half a percent while only bin counts are kept
+_BIN_RATIO = 1.005
+_LOG_BIN_RATIO = math.log(_BIN_RATIO)
+
+ProgressCallback = Callable[[float, str], None]
+
+
+class SpotStats:
+    """
+    Streaming per (instance type, availability zone) aggregate of spot
+    price changes: count, sum and a sparse log-binned histogram. Pages are
+    added as they arrive and never kept.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count: Dict[tuple, int] = {}
+        self._sum: Dict[tuple, float] = {}
+        self._bins: Dict[tuple, Dict[int, int]] = {}
+
+    def add_page(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        page = pd.DataFrame(records, columns=["InstanceType", "AvailabilityZone", "SpotPrice"])
+        prices = page["SpotPrice"].astype(float).to_numpy()
+        page["bin"] = np.floor(np.log(np.maximum(prices, 1e-6)) / _LOG_BIN_RATIO).astype(np.int64)
+        page["price"] = prices
+
+        totals = page.groupby(["InstanceType", "AvailabilityZone"])["price"].agg(["count", "sum"])
+        histogram = page.groupby(["InstanceType", "AvailabilityZone", "bin"]).size()
+        with self._lock:
+            for group, (count, total) in totals.iterrows():
+                self._count[group] = self._count.get(group, 0) + int(count)
+                self._sum[group] = self._sum.get(group, 0.0) + float(total)
+            for (instance_type, az, b), n in histogram.items():
+                counts = self._bins.setdefault((instance_type, az), {})
+                counts[int(b)] = counts.get(int(b), 0) + int(n)
+
+    @staticmethod
+    def _quantile(bins: Dict[int, int], q: float) -> float:
+        edges = np.array(sorted(bins))
+        cumulative = np.cumsum([bins[b] for b in edges])
+        b = edges[np.searchsorted(cumulative, q * cumulative[-1])]
+        # Geometric midpoint of the bin
+        return math.exp((b + 0.5) * _LOG_BIN_RATIO)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns per instance type the mean and p90 hourly spot price over
+        every AZ, and the cheapest interruption-tolerant AZ: the one with
+        the lowest p90, i.e. cheapest for a fleet that rides out price spikes.
+        """
+        with self._lock:
+            by_type: Dict[str, List[tuple]] = {}
+            for group in self._count:
+                by_type.setdefault(group[0], []).append(group)
+
+            stats = {}
+            for instance_type, groups in by_type.items():
+                merged: Dict[int, int] = {}
+                for group in groups:
+                    for b, n in self._bins[group].items():
+                        merged[b] = merged.get(b, 0) + n
+                az_p90 = {group[1]: self._quantile(self._bins[group], 0.9) for group in groups}
+                cheapest_az = min(az_p90, key=az_p90.get)
+                stats[instance_type] = {
+                    "mean_hourly": sum(self._sum[g] for g in groups) / sum(self._count[g] for g in groups),
+                    "p90_hourly": self._quantile(merged, 0.9),
+                    "cheapest_az": cheapest_az,
+                    "cheapest_az_p90_hourly": az_p90[cheapest_az],
+                }
+            return stats
+
+
+def _stream_az_history(ec2, az: str, instance_types: List[str], start_time: datetime, stats: SpotStats) -> None:
+    paginator = ec2.get_paginator("describe_spot_price_history")
+    pages = paginator.paginate(
+        AvailabilityZone=az,
+        InstanceTypes=instance_types,
+        ProductDescriptions=[SPOT_PRODUCT],
+        StartTime=start_time,
+    )
+    for page in pages:
+        stats.add_page(page["SpotPriceHistory"])
+
+
+def fetch_spot_stats(
+    types_by_region: Dict[str, Iterable[str]],
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[Dict[str, Dict[str, Dict[str, Any]]], Dict[str, List[str]]]:
+    """
+    Streams SPOT_HISTORY_DAYS of Linux spot price history for the given
+    instance types, one paginated query per region and availability zone
+    run concurrently. Returns per region code the SpotStats summary, and
+    the errors of regions or AZs that could not be read.
+    """
+    access_key = os.getenv("AWS_ACCESS_KEY_ID")
+    secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
+    start_time = datetime.now(timezone.utc) - timedelta(days=SPOT_HISTORY_DAYS)
+
+    tasks = []
+    stats: Dict[str, SpotStats] = {}
+    errors: Dict[str, List[str]] = {}
+    for region, instance_types in types_by_region.items():
+        region_code = REGION_MAP.get(region, region)
+        try:
+            ec2 = boto3.client(
+                "ec2",
+                region_name=region_code,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+            )
+            zones = ec2.describe_availability_zones(
+                Filters=[{"Name": "zone-type", "Values": ["availability-zone"]}]
+            )["AvailabilityZones"]
+        except Exception as e:
+            errors[region_code] = [f"{region_code}: {e}"]
+            continue
+        stats[region_code] = SpotStats()
+        for zone in zones:
+            tasks.append((ec2, region_code, zone["ZoneName"], sorted(instance_types)))
+
+    lock = threading.Lock()
+    done = 0
+
+    def run(ec2, region_code: str, az: str, instance_types: List[str]) -> None:
+        nonlocal done
+        try:
+            _stream_az_history(ec2, az, instance_types, start_time, stats[region_code])
+        except Exception as e:
+            # Statistics then cover the other AZs of the region
+            with lock:
+                errors.setdefault(region_code, []).append(f"{az}: {e}")
+        with lock:
+            done += 1
+            if progress:
+                progress(done / len(tasks), f"Streamed spot history for {az}")
+
+    with ThreadPoolExecutor(max_workers=SPOT_WORKERS) as executor:
+        for future in [executor.submit(run, *task) for task in tasks]:
+            future.result()
+    summaries = {region_code: region_stats.summary() for region_code, region_stats in stats.items()}
+    return summaries, errors
+
+
+def _spot_columns(prefix: str, stats: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    if stats is None:
+        return {
+            f"{prefix}_spot_mean_monthly": "N/A",
+            f"{prefix}_spot_p90_monthly": "N/A",
+            f"{prefix}_spot_cheapest_az": "N/A",
+            f"{prefix}_spot_cheapest_az_p90_monthly": "N/A",
+        }
+    return {
+        f"{prefix}_spot_mean_monthly": format_currency(stats["mean_hourly"] * HOURS_PER_MONTH),
+        f"{prefix}_spot_p90_monthly": format_currency(stats["p90_hourly"] * HOURS_PER_MONTH),
+        f"{prefix}_spot_cheapest_az": stats["cheapest_az"],
+        f"{prefix}_spot_cheapest_az_p90_monthly": format_currency(
+            stats["cheapest_az_p90_hourly"] * HOURS_PER_MONTH
+        ),
+    }
+
+
+def merge_spot_stats(
+    results: List[Dict[str, Any]],
+    spot: Dict[str, Dict[str, Dict[str, Any]]],
+    errors: Optional[Dict[str, List[str]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Adds spot mean, p90 and cheapest AZ columns for the input instance and
+    its Graviton candidate to fetch_ec2_comparison results. Rows of regions
+    with unreadable spot history also get a spot_error column.
+    """
+    errors = errors or {}
+    merged = []
+    for row in results:
+        region_code = REGION_MAP.get(row["region"], row["region"])
+        region_stats = spot.get(region_code, {})
+        row = {**row, **_spot_columns("original", region_stats.get(row["input_type"]))}
+        if "candidate_type" in row:
+            row.update(_spot_columns("candidate", region_stats.get(row["candidate_type"])))
+        if region_code in errors:
+            row["spot_error"] = "; ".join(sorted(errors[region_code]))
+        merged.append(row)
+    return merged
+
+
+def run_spot_job(
+    rows: List[Dict[str, Any]],
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
+    """
+    Background job entry point: the Graviton comparison, then the spot
+    history of every input and candidate type merged into its rows.
+    """
+    plan: List[Dict[str, Any]] = []
+
+    def comparison_progress(fraction: float, message: str) -> None:
+        if progress:
+            progress(fraction / 2, message)
+
+    def spot_progress(fraction: float, message: str) -> None:
+        if progress:
+            progress(0.5 + fraction / 2, message)
+
+    results = fetch_ec2_comparisons(rows, comparison_progress, plan)
+    types_by_region: Dict[str, Set[str]] = {}
+    for row in results:
+        types = types_by_region.setdefault(REGION_MAP.get(row["region"], row["region"]), set())
+        types.add(row["input_type"])
+        if "candidate_type" in row:
+            types.add(row["candidate_type"])
+
+    spot, errors = fetch_spot_stats(types_by_region, spot_progress)
+    return {"results": merge_spot_stats(results, spot, errors), "plan": plan}
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Tuple
+from pydantic import TypeAdapter, ValidationError
+from .helpers import REGION_MAP
+from .models import Entry
+from .projection import DATE_FORMAT
+
+EC2_COLUMNS = ["instance_type", "vcpus", "memory_gb", "region"]
+ERROR_COLUMNS = ["row", "field", "value", "error"]
+
+REGION_CODE_PATTERN = r"[a-z]{2}(-gov)?-[a-z]+-\d"
+INSTANCE_TYPE_PATTERN = r"[a-z0-9-]+\.[a-z0-9-]+"
+
+_ENTRY_LIST = TypeAdapter(List[Entry])
+
+
+def normalize_regions(regions: pd.Series) -> pd.Series:
+    """
+    Maps REGION_MAP aliases (case-insensitive) to region codes and keeps
+    values that already are region codes. Anything else becomes NaN.
+    """
+    aliases = {name.lower(): code for name, code in REGION_MAP.items()}
+    aliases.update({code: code for code in REGION_MAP.values()})
+    cleaned = regions.astype(str).str.strip().str.lower()
+    codes = cleaned.map(aliases)
+    is_code = cleaned.str.fullmatch(REGION_CODE_PATTERN).fillna(False)
+    return codes.where(codes.notna(), cleaned.where(is_code))
+
+
+def _row_errors(rows: np.ndarray, field: str, values, message: str) -> List[Dict[str, Any]]:
+    # rows are 0-based positions; the report uses 1-based data row numbers
+    return [
+        {"row": int(row) + 1, "field": field, "value": str(value), "error": message}
+        for row, value in zip(rows, values)
+    ]
+
+
+def validate_ec2_inventory(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Validates a whole EC2 inventory column by column.
+
+    Returns the valid rows (typed, with region codes) and a per-row error
+    report. Missing columns are a file-level error and raise ValueError.
+    """
+    missing = set(EC2_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing required columns: {sorted(missing)}")
+
+    df = df.reset_index(drop=True)
+    # Instance types are case-insensitive, the pricing API wants lower case
+    instance_types = df["instance_type"].astype(str).str.strip().str.lower()
+    vcpus = pd.to_numeric(df["vcpus"], errors="coerce")
+    memory_gb = pd.to_numeric(df["memory_gb"], errors="coerce")
+    regions = normalize_regions(df["region"])
+
+    checks = [
+        (
+            "instance_type",
+            ~instance_types.str.fullmatch(INSTANCE_TYPE_PATTERN).fillna(False)
+            | df["instance_type"].isna(),
+            "Invalid instance type, expected e.g. m5.large",
+        ),
+        ("vcpus", ~((vcpus > 0) & (vcpus % 1 == 0)), "vCPUs must be a positive integer"),
+        ("memory_gb", ~(memory_gb > 0), "Memory must be a positive number of GiB"),
+        ("region", regions.isna(), "Unknown region, use a region code or one of: " + ", ".join(REGION_MAP)),
+    ]
+
+    errors = []
+    invalid = np.zeros(len(df), dtype=bool)
+    for field, mask, message in checks:
+        mask = mask.to_numpy(dtype=bool)
+        rows = np.flatnonzero(mask)
+        errors.extend(_row_errors(rows, field, df[field].to_numpy()[rows], message))
+        invalid |= mask
+
+    valid = pd.DataFrame(
+        {
+            "instance_type": instance_types,
+            "vcpus": vcpus,
+            "memory_gb": memory_gb,
+            "region": regions,
+        }
+    )[~invalid]
+    valid = valid.astype({"vcpus": int, "memory_gb": float})
+    report = pd.DataFrame(errors, columns=ERROR_COLUMNS).sort_values("row", kind="stable")
+    return valid, report.reset_index(drop=True)
+
+
+def validate_rds_entries(records: Any) -> Tuple[List[Entry], pd.DataFrame]:
+    """
+    Validates a JSON array of RDS entries in one pass.
+
+    Schema checks run through a list-level TypeAdapter; regions are then
+    normalized and dates checked column-wise. Returns the valid entries and
+    a per-row error report.
+    """
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array of entries")
+
+    errors = []
+    try:
+        entries = _ENTRY_LIST.validate_python(records)
+        positions = list(range(len(records)))
+    except ValidationError as e:
+        bad = set()
+        for err in e.errors():
+            row = err["loc"][0]
+            bad.add(row)
+            field = ".".join(str(part) for part in err["loc"][1:]) or "entry"
+            errors.append(
+                {"row": row + 1, "field": field, "value": str(err.get("input")), "error": err["msg"]}
+            )
+        positions = [i for i in range(len(records)) if i not in bad]
+        entries = _ENTRY_LIST.validate_python([records[i] for i in positions])
+
+    positions = np.array(positions, dtype=int)
+    regions = normalize_regions(pd.Series([e.region for e in entries], dtype=object))
+    starts_raw = pd.Series([e.start for e in entries], dtype=object)
+    ends_raw = pd.Series([e.end for e in entries], dtype=object)
+    starts = pd.to_datetime(starts_raw, format=DATE_FORMAT, errors="coerce")
+    ends = pd.to_datetime(ends_raw, format=DATE_FORMAT, errors="coerce")
+
+    checks = [
+        ("region", regions.isna(), [e.region for e in entries],
+         "Unknown region, use a region code or one of: " + ", ".join(REGION_MAP)),
+        ("start", starts.isna(), starts_raw, "Invalid date, expected MM/DD/YYYY"),
+        ("end", ends.isna(), ends_raw, "Invalid date, expected MM/DD/YYYY"),
+        ("end", ends < starts, ends_raw, "End date is before start date"),
+    ]
+    invalid = np.zeros(len(entries), dtype=bool)
+    for field, mask, values, message in checks:
+        mask = np.asarray(mask, dtype=bool)
+        rows = np.flatnonzero(mask)
+        errors.extend(_row_errors(positions[rows], field, np.asarray(values, dtype=object)[rows], message))
+        invalid |= mask
+
+    valid_entries = []
+    for entry, region, is_invalid in zip(entries, regions, invalid):
+        if not is_invalid:
+            entry.region = region
+            entry.instance_type = entry.instance_type.strip().lower()
+            valid_entries.append(entry)
+
+    report = pd.DataFrame(errors, columns=ERROR_COLUMNS).sort_values("row", kind="stable")
+    return valid_entries, report.reset_index(drop=True)
+